@@ -1,12 +1,17 @@
+import asyncio
 import logging
 import os
 
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.discover.api.router import discover_router
 from backend.events.router import events_router
 from backend.exposure.api.router import exposure_router
+from backend.exposure.api.upload_limit import UploadSizeLimitMiddleware
+from backend.worker_commons import config
+from backend.worker_commons.io.storage import get_storage_client
 
 app = FastAPI()
 
@@ -23,6 +28,33 @@ if enable_cors:
         allow_headers=["*"],
     )
 
+# enforces the upload size limit before the multipart body is spooled to disk
+app.add_middleware(UploadSizeLimitMiddleware, path_prefix="/api/exposure/upload/")
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    # sync route handlers (blocking redis, storage and celery calls) run in this threadpool,
+    # so they never stall the event loop
+    anyio.to_thread.current_default_thread_limiter().total_tokens = config.get_api_threadpool_size()
+
+
 app.include_router(events_router, prefix="/api/events")
 app.include_router(discover_router, prefix="/api/discover")
 app.include_router(exposure_router, prefix="/api/exposure")
+
+
+async def __sweep_storage():
+    while True:
+        await anyio.sleep(config.get_storage_sweep_interval())
+        try:
+            await anyio.to_thread.run_sync(get_storage_client().sweep)
+        except Exception as error:
+            logging.warning(f"Failed to sweep the storage: {error}")
+
+
+@app.on_event("startup")
+async def schedule_storage_sweep():
+    # uploads are stored by content hash and kept while a workspace maps to them
+    if config.get_storage_sweep_interval() > 0:
+        app.state.storage_sweep = asyncio.get_running_loop().create_task(__sweep_storage())
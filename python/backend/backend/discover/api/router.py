@@ -1,5 +1,6 @@
 import celery.states as states
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from tensorflow.python.framework.ops import disable_eager_execution
 
 from backend.discover.algorithms.deci import DeciPayload, DeciRunner
@@ -9,6 +10,7 @@ from backend.discover.algorithms.pc import PCPayload, PCRunner
 from backend.discover.model.interventions import InterventionPayload
 from backend.discover.worker.causal_discovery_task import causal_discovery_task
 from backend.discover.worker.deci_intervention_task import deci_intervention_task
+from backend.worker_commons.io.events import stream_events, task_events_channel
 
 disable_eager_execution()
 
@@ -44,6 +46,25 @@ def get_discover_results(task_id: str):
         return {"status": async_task.status, "progress": get_progress(async_task)}
 
 
+@discover_router.get("/{task_id}/stream")
+def stream_discover_results(task_id: str):
+    last_state = {"value": None}
+
+    def read_state():
+        results = get_discover_results(task_id)
+        finished = results["status"] in states.READY_STATES
+        # the final result is always sent, in progress states only when the status or progress changed
+        changed = finished or results != last_state["value"]
+        last_state["value"] = results
+        return (results if changed else None), finished
+
+    return StreamingResponse(
+        stream_events(task_events_channel(task_id), read_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @discover_router.delete("/{task_id}")
 def cancel_discover(task_id: str):
     causal_discovery_task.AsyncResult(task_id).revoke(terminate=True)
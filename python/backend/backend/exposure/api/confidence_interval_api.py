@@ -26,7 +26,7 @@ class ConfidenceIntervalRequestBody(BaseModel):
 
 
 @confidence_interval_router.post("/{workspace_name}")
-async def confidence_interval(workspace_name: str, body: ConfidenceIntervalRequestBody):
+def confidence_interval(workspace_name: str, body: ConfidenceIntervalRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
@@ -43,12 +43,17 @@ async def confidence_interval(workspace_name: str, body: ConfidenceIntervalReque
 
 
 @confidence_interval_router.get("/{workspace_name}/{task_id}")
-async def fetch_results(workspace_name: str, task_id: str):
-    return go.get_results(workspace_name, task_id, "confidence_interval").to_dict()
+def fetch_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.get_results(workspace_name, task_id, "confidence_interval", cursor).to_dict()
+
+
+@confidence_interval_router.get("/{workspace_name}/{task_id}/stream")
+def stream_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.stream_results(workspace_name, task_id, "confidence_interval", cursor)
 
 
 @confidence_interval_router.delete("/{workspace_name}/{task_id}")
-async def cancel_task(workspace_name: str, task_id: str):
+def cancel_task(workspace_name: str, task_id: str):
     try:
         return go.cancel_task(workspace_name, task_id, "confidence_interval")
     except Exception as e:
@@ -56,7 +61,7 @@ async def cancel_task(workspace_name: str, task_id: str):
 
 
 @confidence_interval_router.post("/execution_count/{workspace_name}")
-async def get_number_of_executions(workspace_name: str, body: ConfidenceIntervalRequestBody):
+def get_number_of_executions(workspace_name: str, body: ConfidenceIntervalRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
@@ -7,11 +7,15 @@ import logging
 
 from fastapi import APIRouter, HTTPException
 
+from backend.exposure import config
 from backend.exposure.api import group_operations as go
-from backend.exposure.inference.estimate_effect import get_tasks
-from backend.exposure.model.estimate_effect_models import EstimateEffectRequestBody
+from backend.exposure.inference.estimate_effect import get_tasks, group_specifications
+from backend.exposure.model.estimate_effect_models import EstimateEffectRequestBody, Specification
 from backend.exposure.model.response import NumberOfExecutionsResult
-from backend.exposure.worker.estimate_effect_task import estimate_effect_for_specification
+from backend.exposure.worker.estimate_effect_task import (
+    estimate_effect_for_specification,
+    estimate_effect_for_specifications,
+)
 from backend.worker_commons.io.exceptions import DataFrameNotLoadedError
 from backend.worker_commons.io.storage import get_storage_client
 
@@ -22,8 +26,12 @@ estimate_effect_router = APIRouter(
 )
 
 
+def __get_soft_time_limit(specification: Specification) -> int:
+    return config.get_estimator_soft_time_limit(specification.estimator.method_name)
+
+
 @estimate_effect_router.post("/{workspace_name}")
-async def estimate_effect(workspace_name: str, body: EstimateEffectRequestBody):
+def estimate_effect(workspace_name: str, body: EstimateEffectRequestBody):
     storage_client = get_storage_client()
     try:
         specifications = get_tasks(
@@ -42,21 +50,37 @@ async def estimate_effect(workspace_name: str, body: EstimateEffectRequestBody):
             detail=f"{dfnle.dataframe_name} not uploaded for workspace: {dfnle.workspace_name}",
         )
 
+    valid_specifications = [spec for spec in specifications if spec.is_valid()]
+    if config.get_estimate_effect_chunking():
+        return go.schedule_chunked_task(
+            workspace_name,
+            "estimate_effect",
+            estimate_effect_for_specifications,
+            group_specifications(valid_specifications, config.get_estimate_effect_max_chunk_size()),
+            __get_soft_time_limit,
+        )
+
     return go.schedule_task(
         workspace_name,
         "estimate_effect",
         estimate_effect_for_specification,
-        [spec for spec in specifications if spec.is_valid()],
+        valid_specifications,
+        __get_soft_time_limit,
     )
 
 
 @estimate_effect_router.get("/{workspace_name}/{task_id}")
-async def fetch_results(workspace_name: str, task_id: str):
-    return go.get_results(workspace_name, task_id, "estimate_effect").to_dict()
+def fetch_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.get_results(workspace_name, task_id, "estimate_effect", cursor).to_dict()
+
+
+@estimate_effect_router.get("/{workspace_name}/{task_id}/stream")
+def stream_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.stream_results(workspace_name, task_id, "estimate_effect", cursor)
 
 
 @estimate_effect_router.delete("/{workspace_name}/{task_id}")
-async def cancel_task(workspace_name: str, task_id: str):
+def cancel_task(workspace_name: str, task_id: str):
     try:
         return go.cancel_task(workspace_name, task_id, "estimate_effect")
     except Exception as e:
@@ -64,7 +88,7 @@ async def cancel_task(workspace_name: str, task_id: str):
 
 
 @estimate_effect_router.post("/execution_count/{workspace_name}")
-async def get_number_of_executions(workspace_name: str, body: EstimateEffectRequestBody):
+def get_number_of_executions(workspace_name: str, body: EstimateEffectRequestBody):
 
     outcome_models = [model for model in body.estimator_specs if model.type == "Outcome Model"]
     treatment_models = [model for model in body.estimator_specs if model.type == "Treatment Assignment Model"]
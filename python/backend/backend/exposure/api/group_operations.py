@@ -4,20 +4,51 @@
 #
 
 from collections import defaultdict
-from typing import Any, List
+from typing import Any, Callable, List, Optional
+from uuid import uuid4
 
 from celery import group, states
 from celery.result import AsyncResult
+from fastapi.responses import StreamingResponse
 
+from backend.exposure import config
 from backend.exposure.model.response import StatusModel
+from backend.exposure.worker.group_progress import (
+    get_group_progress,
+    init_group_progress,
+    record_group_revoked,
+    record_task_failure,
+)
 from backend.worker_commons.io.db import get_db_client
+from backend.worker_commons.io.events import group_events_channel, stream_events
 
 
-def schedule_task(workspace_name: str, task_name: str, task: Any, params: List):
+def __with_time_limits(signature, soft_time_limit: Optional[int]):
+    if soft_time_limit is None:
+        return signature
+    return signature.set(soft_time_limit=soft_time_limit, time_limit=soft_time_limit + config.get_time_limit_grace())
+
+
+def schedule_task(
+    workspace_name: str,
+    task_name: str,
+    task: Any,
+    params: List,
+    get_soft_time_limit: Optional[Callable[[Any], int]] = None,
+):
     db_client = get_db_client()
-    async_group = group([task.s(specification=specification) for specification in params])
+    async_group = group(
+        [
+            __with_time_limits(
+                task.s(specification=specification).on_error(record_task_failure.s()),
+                get_soft_time_limit(specification) if get_soft_time_limit is not None else None,
+            )
+            for specification in params
+        ]
+    )
 
-    results = async_group()
+    # the ids are assigned up front, so progress is tracked before any task can finish or be polled
+    results = async_group.freeze()
 
     tasks_ids = [task.id for task in results.results]
 
@@ -25,10 +56,56 @@ def schedule_task(workspace_name: str, task_name: str, task: Any, params: List):
         f"{workspace_name}:{task_name}:{results.id}",
         tasks_ids,
     )
+    init_group_progress(results.id, len(tasks_ids))
+    async_group.apply_async()
 
     return {"id": results.id, "total": len(tasks_ids)}
 
 
+def schedule_chunked_task(
+    workspace_name: str,
+    task_name: str,
+    task: Any,
+    chunks: List[List],
+    get_soft_time_limit: Optional[Callable[[Any], int]] = None,
+):
+    """
+    Schedules one task per chunk of specifications, results get their own ids up front
+    so progress and results are still reported per specification.
+    Each specification keeps its own time limit within the chunk (soft_time_limits),
+    the time limit of the chunk is the sum of them
+    """
+    db_client = get_db_client()
+    signatures = []
+    for chunk in chunks:
+        soft_time_limits = (
+            [get_soft_time_limit(specification) for specification in chunk] if get_soft_time_limit is not None else None
+        )
+        signature = task.s(
+            specifications=chunk,
+            result_ids=[str(uuid4()) for _ in chunk],
+            soft_time_limits=soft_time_limits,
+        ).on_error(record_task_failure.s())
+        signatures.append(__with_time_limits(signature, sum(soft_time_limits) if soft_time_limits else None))
+    async_group = group(signatures)
+
+    # the ids are assigned up front, so progress is tracked before any task can finish or be polled
+    results = async_group.freeze()
+
+    # the chunk task ids, needed to cancel the group
+    tasks_ids = [task.id for task in results.results]
+
+    db_client.set_value(
+        f"{workspace_name}:{task_name}:{results.id}",
+        tasks_ids,
+    )
+    total = sum(len(chunk) for chunk in chunks)
+    init_group_progress(results.id, total)
+    async_group.apply_async()
+
+    return {"id": results.id, "total": total}
+
+
 def get_async_result(workspace_name: str, group_id: str, task_name: str):
     db_client = get_db_client()
     ids = db_client.get_value(f"{workspace_name}:{task_name}:{group_id}")
@@ -42,12 +119,69 @@ def get_async_result(workspace_name: str, group_id: str, task_name: str):
     return results_dict
 
 
-def get_results(workspace_name: str, group_id: str, task_name: str):
+def get_results(workspace_name: str, group_id: str, task_name: str, cursor: int = 0):
+    """
+    Returns the group status with the results finished after the cursor,
+    the returned cursor can be sent back to only get newer results
+    """
+    progress = get_group_progress(group_id, cursor)
+    if progress is None:
+        return __get_results_from_async_results(workspace_name, group_id, task_name)
+
+    finished_results = [result for result in get_db_client().get_many(progress.finished_ids) if result is not None]
+
+    status = states.PENDING
+    if progress.completed + progress.failed > 0:
+        status = states.STARTED
+    if progress.failed > 0:
+        status = states.FAILURE
+    if progress.completed == progress.total:
+        status = states.SUCCESS
+    if progress.revoked:
+        status = states.REVOKED
+
+    return StatusModel(
+        status=status,
+        completed=progress.completed,
+        pending=progress.total - progress.completed - progress.failed,
+        failed=progress.failed,
+        results=[result for result in finished_results if result.exc_info is None],
+        failures=[result for result in finished_results if result.exc_info is not None],
+        cursor=progress.cursor,
+    )
+
+
+def stream_results(workspace_name: str, group_id: str, task_name: str, cursor: int = 0):
+    """
+    Streams the group status as server sent events, each event only carries the results
+    finished since the previous one and the stream ends once no task is pending
+    """
+    position = {"cursor": cursor, "counters": None}
+
+    def read_state():
+        status = get_results(workspace_name, group_id, task_name, position["cursor"])
+        counters = (status.status, status.completed, status.pending, status.failed)
+        changed = counters != position["counters"] or len(status.results) > 0 or len(status.failures) > 0
+        position["counters"] = counters
+        if status.cursor is not None:
+            position["cursor"] = status.cursor
+        finished = status.pending == 0 or status.status == states.REVOKED
+        return (status.to_dict() if changed else None), finished
+
+    return StreamingResponse(
+        stream_events(group_events_channel(group_id), read_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def __get_results_from_async_results(workspace_name: str, group_id: str, task_name: str):
+    # groups scheduled before progress tracking existed
     db_client = get_db_client()
 
     results = get_async_result(workspace_name, group_id, task_name)
 
-    completed_results = [db_client.get_value(result.id) for result in results[states.SUCCESS] + results[states.PENDING]]
+    completed_results = db_client.get_many([result.id for result in results[states.SUCCESS] + results[states.PENDING]])
 
     succeeded_results = [result for result in completed_results if result is not None and result.exc_info is None]
     failed_results = [result for result in completed_results if result is not None and result.exc_info is not None]
@@ -85,5 +219,6 @@ def cancel_task(workspace_name: str, group_id: str, task_name: str):
 
     for id in ids:
         AsyncResult(id).revoke(terminate=True)
+    record_group_revoked(group_id)
 
     return {"status": states.REVOKED}
@@ -30,7 +30,7 @@ class CreateCausalModelRequestBody(BaseModel):
 
 
 @identify_estimand_router.post("/{workspace_name}")
-async def identify_estimand(workspace_name: str, body: CreateCausalModelRequestBody):
+def identify_estimand(workspace_name: str, body: CreateCausalModelRequestBody):
     dataframe: Optional[pd.DataFrame] = None
 
     if body.dataframe:
@@ -49,7 +49,7 @@ async def identify_estimand(workspace_name: str, body: CreateCausalModelRequestB
 
 
 @identify_estimand_router.get("/{workspace_name}/{task_id}")
-async def status(workspace_name: str, task_id: str):
+def status(workspace_name: str, task_id: str):
     async_task = AsyncResult(task_id)
     if async_task.status == states.SUCCESS:
         return async_task.get().to_dict()
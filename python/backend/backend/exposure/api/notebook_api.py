@@ -195,7 +195,7 @@ print(p_value_str)"""
 
 
 @notebook_router.post("/")
-async def generate_notebook(body: NotebookRequestBody):
+def generate_notebook(body: NotebookRequestBody):
     notebook = nbf.v4.new_notebook()
 
     notebook["cells"] = [
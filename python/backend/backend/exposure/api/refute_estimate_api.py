@@ -27,7 +27,7 @@ class RefuteEstimateRequestBody(BaseModel):
 
 
 @refute_estimate_router.post("/{workspace_name}")
-async def refute_estimate(workspace_name: str, body: RefuteEstimateRequestBody):
+def refute_estimate(workspace_name: str, body: RefuteEstimateRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
@@ -39,12 +39,17 @@ async def refute_estimate(workspace_name: str, body: RefuteEstimateRequestBody):
 
 
 @refute_estimate_router.get("/{workspace_name}/{task_id}")
-async def fetch_results(workspace_name: str, task_id: str):
-    return go.get_results(workspace_name, task_id, "refute_estimate").to_dict()
+def fetch_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.get_results(workspace_name, task_id, "refute_estimate", cursor).to_dict()
+
+
+@refute_estimate_router.get("/{workspace_name}/{task_id}/stream")
+def stream_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.stream_results(workspace_name, task_id, "refute_estimate", cursor)
 
 
 @refute_estimate_router.delete("/{workspace_name}/{task_id}")
-async def cancel_task(workspace_name: str, task_id: str):
+def cancel_task(workspace_name: str, task_id: str):
     try:
         return go.cancel_task(workspace_name, task_id, "refute_estimate")
     except Exception as e:
@@ -52,7 +57,7 @@ async def cancel_task(workspace_name: str, task_id: str):
 
 
 @refute_estimate_router.post("/execution_count/{workspace_name}")
-async def get_number_of_executions(workspace_name: str, body: RefuteEstimateRequestBody):
+def get_number_of_executions(workspace_name: str, body: RefuteEstimateRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
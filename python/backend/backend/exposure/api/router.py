@@ -3,7 +3,7 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
-from fastapi import APIRouter, UploadFile
+from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile
 
 from backend.exposure.api.confidence_interval_api import confidence_interval_router
 from backend.exposure.api.estimate_effect_api import estimate_effect_router
@@ -12,6 +12,7 @@ from backend.exposure.api.notebook_api import notebook_router
 from backend.exposure.api.refute_estimate_api import refute_estimate_router
 from backend.exposure.api.shap_interpreter_api import shap_interpreter_router
 from backend.exposure.api.significance_test_api import significance_test_router
+from backend.worker_commons.io.exceptions import FileTooLargeError
 from backend.worker_commons.io.storage import get_storage_client
 
 exposure_router = APIRouter()
@@ -37,10 +38,18 @@ def health_check():
 
 
 @exposure_router.post("/upload/{workspace_name}")
-async def upload(workspace_name: str, file: UploadFile):
+def upload(workspace_name: str, file: UploadFile, background_tasks: BackgroundTasks):
     try:
         storage_client = get_storage_client()
-        storage_client.save(str(workspace_name), file.filename, file.file.read())
-        return {"status": "ok"}
+        content_hash = storage_client.save(str(workspace_name), file.filename, file.file)
+        # the conversion runs in the api threadpool after the response, where the uploaded file lives,
+        # reads use the saved file until it's done
+        background_tasks.add_task(storage_client.ingest, content_hash)
+        return {"status": "ok", "hash": content_hash}
+    except FileTooLargeError as ftle:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{ftle.file_path} is larger than the {ftle.max_size} bytes allowed",
+        )
     except Exception as error:
         return {"status": str(error)}
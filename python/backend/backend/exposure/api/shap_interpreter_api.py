@@ -24,7 +24,7 @@ class ShapInterpreterRequestBody(BaseModel):
 
 
 @shap_interpreter_router.post("/{workspace_name}")
-async def interpret(workspace_name: str, body: ShapInterpreterRequestBody):
+def interpret(workspace_name: str, body: ShapInterpreterRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
@@ -36,12 +36,17 @@ async def interpret(workspace_name: str, body: ShapInterpreterRequestBody):
 
 
 @shap_interpreter_router.get("/{workspace_name}/{task_id}")
-async def fetch_results(workspace_name: str, task_id: str):
-    return go.get_results(workspace_name, task_id, "shap_interpreter").to_dict()
+def fetch_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.get_results(workspace_name, task_id, "shap_interpreter", cursor).to_dict()
+
+
+@shap_interpreter_router.get("/{workspace_name}/{task_id}/stream")
+def stream_results(workspace_name: str, task_id: str, cursor: int = 0):
+    return go.stream_results(workspace_name, task_id, "shap_interpreter", cursor)
 
 
 @shap_interpreter_router.delete("/{workspace_name}/{task_id}")
-async def cancel_task(workspace_name: str, task_id: str):
+def cancel_task(workspace_name: str, task_id: str):
     try:
         return go.cancel_task(workspace_name, task_id, "shap_interpreter")
     except Exception as e:
@@ -49,7 +54,7 @@ async def cancel_task(workspace_name: str, task_id: str):
 
 
 @shap_interpreter_router.post("/execution_count/{workspace_name}")
-async def get_number_of_executions(workspace_name: str, body: ShapInterpreterRequestBody):
+def get_number_of_executions(workspace_name: str, body: ShapInterpreterRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
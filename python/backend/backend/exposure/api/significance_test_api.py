@@ -8,6 +8,7 @@ from typing import List
 from celery import chord, states
 from celery.result import AsyncResult
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from backend.exposure import config
@@ -16,6 +17,7 @@ from backend.exposure.model.response import NumberOfExecutionsResult, StatusMode
 from backend.exposure.model.significance_test_models import PropensityScoreSpec, SignificanceTestResult
 from backend.exposure.worker.significance_test_task import calculate_propensity_score, compute_null_effects
 from backend.worker_commons.io.db import get_db_client
+from backend.worker_commons.io.events import stream_events, task_events_channel
 
 significance_test_router = APIRouter(
     prefix="/significance_test",
@@ -30,7 +32,7 @@ class SignificanceTestRequestBody(BaseModel):
 
 
 @significance_test_router.post("/{workspace_name}")
-async def significance_test(workspace_name: str, body: SignificanceTestRequestBody):
+def significance_test(workspace_name: str, body: SignificanceTestRequestBody):
     results = go.get_results(workspace_name, body.estimate_execution_id, "estimate_effect")
 
     if results.pending > 0:
@@ -39,6 +41,7 @@ async def significance_test(workspace_name: str, body: SignificanceTestRequestBo
     filtered_estimates = [
         PropensityScoreSpec(
             estimate_id=result.id,
+            artifacts_id=result.artifacts_id,
             identified_estimand=result.identified_estimand,
             causal_model=result.causal_model_graph,
             estimate=result.estimate,
@@ -55,15 +58,23 @@ async def significance_test(workspace_name: str, body: SignificanceTestRequestBo
 
 
 @significance_test_router.get("/{workspace_name}/{task_id}")
-async def fetch_results(workspace_name: str, task_id: str):
+def fetch_results(workspace_name: str, task_id: str):
     db_client = get_db_client()
 
-    results = [result for result in db_client.iter_values(task_id)]
-    results = [db_client.get_value(result) for result in results]
+    results = db_client.get_many(list(db_client.iter_values(task_id)))
 
     total = config.get_significance_simulations()
 
     if len(results) < total:
+        # the chord callback is marked failed when a propensity score task fails (e.g. the estimate artifacts expired)
+        if AsyncResult(task_id).state == states.FAILURE:
+            return StatusModel(
+                status=states.FAILURE,
+                completed=len(results),
+                pending=0,
+                failed=total - len(results),
+                results=None,
+            )
         return StatusModel(
             status=states.STARTED,
             completed=len(results),
@@ -97,11 +108,28 @@ async def fetch_results(workspace_name: str, task_id: str):
         )
 
 
+@significance_test_router.get("/{workspace_name}/{task_id}/stream")
+def stream_results(workspace_name: str, task_id: str):
+    last_state = {"value": None}
+
+    def read_state():
+        status = fetch_results(workspace_name, task_id)
+        changed = (status.status, status.completed) != last_state["value"]
+        last_state["value"] = (status.status, status.completed)
+        return (status if changed else None), status.status in states.READY_STATES
+
+    return StreamingResponse(
+        stream_events(task_events_channel(task_id), read_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @significance_test_router.delete("/{workspace_name}/{task_id}")
-async def cancel_task(workspace_name: str, task_id: str):
+def cancel_task(workspace_name: str, task_id: str):
     return AsyncResult(task_id).revoke(terminate=True)
 
 
 @significance_test_router.post("/execution_count/{workspace_name}")
-async def get_number_of_executions(workspace_name: str, body: SignificanceTestRequestBody):
+def get_number_of_executions(workspace_name: str, body: SignificanceTestRequestBody):
     return NumberOfExecutionsResult(count=config.get_significance_simulations())
@@ -0,0 +1,67 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.worker_commons import config
+
+# room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects uploads larger than MAX_UPLOAD_SIZE_MB while they are still being received,
+    route handlers only run once the whole multipart body has been spooled
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str) -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        max_size = config.get_max_upload_size()
+        max_body_size = max_size + MULTIPART_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body_size:
+            await self.__reject(scope, receive, send, max_size)
+            return
+
+        # requests without a (truthful) content length are counted as they arrive, once over the limit
+        # the app sees a disconnect and its own response is dropped in favor of the rejection
+        received = 0
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    rejected = True
+                    await self.__reject(scope, receive, send, max_size)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    async def __reject(self, scope: Scope, receive: Receive, send: Send, max_size: int) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload is larger than the {max_size} bytes allowed"},
+        )
+        await response(scope, receive, send)
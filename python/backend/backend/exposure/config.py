@@ -3,12 +3,20 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
+import json
 import os
+from datetime import timedelta
 
 DEFAULT_REFUTATION_TESTS = ["random_common_cause", "placebo_treatment_refuter"]
 
 SENSITIVITY_REFUTERS = ["add_unobserved_common_cause"]
 
+# forest estimators are expected to take longer, other estimators use the default soft time limit
+DEFAULT_ESTIMATOR_SOFT_TIME_LIMITS = {
+    "backdoor.econml.dml.CausalForestDML": 1800,
+    "backdoor.econml.dr.ForestDRLearner": 1800,
+}
+
 
 def get_refuters():
     include_sensitivity_refuters = os.environ.get("INCLUDE_SENSITIVITY_REFUTERS", "false").strip().lower() == "true"
@@ -22,3 +30,50 @@ def get_confidence_simulations():
 
 def get_significance_simulations():
     return int(os.environ.get("DEFAULT_SIGNIFICANCE_SIMULATIONS", 100))
+
+
+def get_estimate_effect_chunking():
+    # runs the specifications that share population, treatment, outcome and model in a single task
+    return os.environ.get("ESTIMATE_EFFECT_CHUNKING", "false").strip().lower() == "true"
+
+
+def get_estimate_effect_max_chunk_size():
+    return int(os.environ.get("ESTIMATE_EFFECT_MAX_CHUNK_SIZE", 20))
+
+
+def get_estimate_memoization():
+    return os.environ.get("ESTIMATE_MEMOIZATION", "true").strip().lower() == "true"
+
+
+def get_estimate_memo_expires_after():
+    return timedelta(hours=int(os.environ.get("ESTIMATE_MEMO_EXPIRES_AFTER_HOURS", 24)))
+
+
+def get_estimator_soft_time_limit(method_name: str) -> int:
+    # ESTIMATOR_SOFT_TIME_LIMITS overrides the limits by method name, e.g. {"backdoor.propensity_score_matching": 600}
+    limits = {**DEFAULT_ESTIMATOR_SOFT_TIME_LIMITS, **json.loads(os.environ.get("ESTIMATOR_SOFT_TIME_LIMITS", "{}"))}
+    return int(limits.get(method_name, os.environ.get("ESTIMATE_EFFECT_SOFT_TIME_LIMIT_SECONDS", 900)))
+
+
+def get_time_limit_grace():
+    # time a task gets after its soft limit to store its result, before it is killed
+    return int(os.environ.get("TIME_LIMIT_GRACE_SECONDS", 60))
+
+
+def get_tuning_cache_enabled():
+    return os.environ.get("TUNING_CACHE", "true").strip().lower() == "true"
+
+
+def get_tuning_cache_fitted_models():
+    # also reuses fitted nuisance models (e.g. the significance test propensity model), not only their params
+    return os.environ.get("TUNING_CACHE_FITTED_MODELS", "true").strip().lower() == "true"
+
+
+def get_tuning_cache_expires_after():
+    return timedelta(hours=int(os.environ.get("TUNING_CACHE_EXPIRES_AFTER_HOURS", 24)))
+
+
+def get_tuning_search_mode():
+    # "grid" fits every candidate on all the data, "halving" runs successive halving on growing subsamples
+    # and picks n_estimators with xgboost early stopping
+    return os.environ.get("TUNING_SEARCH_MODE", "grid").strip().lower()
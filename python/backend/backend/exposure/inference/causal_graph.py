@@ -4,13 +4,43 @@
 #
 
 import itertools
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 import networkx as nx
 
 from backend.exposure.model.estimate_effect_models import CausalGraphModelSpec, ModelSpec, OutcomeSpec, TreatmentSpec
 
 
+@lru_cache(maxsize=1024)
+def __get_gml_graph(
+    treatment: str, outcome: str, confounders: Tuple[str, ...], effect_modifiers: Tuple[str, ...]
+) -> str:
+    """
+    The gml graph only depends on its variables, so specs that share them
+    (e.g. across models and requests) also share a single graph string
+    """
+    causal_graph = nx.DiGraph()
+
+    nodes = [treatment] + [outcome] + list(confounders) + list(effect_modifiers)
+    # add nodes
+    for variable in nodes:
+        causal_graph.add_node(variable)
+
+    # add confounder edges
+    for confounder in confounders:
+        causal_graph.add_edge(confounder, treatment)
+        causal_graph.add_edge(confounder, outcome)
+
+    for modifier in effect_modifiers:
+        causal_graph.add_edge(modifier, outcome)
+
+    # add treatments to outcome edges
+    causal_graph.add_edge(treatment, outcome)
+
+    return " ".join(nx.generate_gml(causal_graph))
+
+
 def __create_gml_graph(
     treatment_specs: List[TreatmentSpec],
     outcome_specs: List[OutcomeSpec],
@@ -25,23 +55,6 @@ def __create_gml_graph(
     for treatment, outcome in list(itertools.product(treatment_specs, outcome_specs)):
         treatment = treatment.variable
         outcome = outcome.variable
-        causal_graph = nx.DiGraph()
-
-        nodes = [treatment] + [outcome] + model_spec.confounders + model_spec.effect_modifiers
-        # add nodes
-        for variable in nodes:
-            causal_graph.add_node(variable)
-
-        # add confounder edges
-        for confounder in model_spec.confounders:
-            causal_graph.add_edge(confounder, treatment)
-            causal_graph.add_edge(confounder, outcome)
-
-        for modifier in model_spec.effect_modifiers:
-            causal_graph.add_edge(modifier, outcome)
-
-        # add treatments to outcome edges
-        causal_graph.add_edge(treatment, outcome)
 
         graphs.append(
             CausalGraphModelSpec(
@@ -51,7 +64,12 @@ def __create_gml_graph(
                 outcome=outcome,
                 confounders=model_spec.confounders,
                 effect_modifiers=model_spec.effect_modifiers,
-                causal_graph=" ".join(nx.generate_gml(causal_graph)),
+                causal_graph=__get_gml_graph(
+                    treatment,
+                    outcome,
+                    tuple(model_spec.confounders),
+                    tuple(model_spec.effect_modifiers),
+                ),
             )
         )
     return graphs
@@ -3,19 +3,93 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
+import copy
 import itertools
 import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
 import dowhy
 import pandas as pd
-from sklearn import preprocessing
+from dowhy.causal_identifier import IdentifiedEstimand
+from joblib import parallel_backend
 
 from backend.exposure.inference.causal_graph import create_gml_model_specs
 from backend.exposure.inference.covariate_balance import COVARIATE_BALANCE_FUNC_MAPPING
 from backend.exposure.inference.estimator import CausalEstimator
 from backend.exposure.model.estimate_effect_models import EstimateResult, PopulationSpecDataFrame, Specification
+from backend.worker_commons import config
+from backend.worker_commons.cache import LRUCache, dataframe_nbytes
 from backend.worker_commons.io.exceptions import DataFrameNotLoadedError, FileNotFoundError
+from backend.worker_commons.io.storage import get_storage_client
+
+
+@dataclass
+class PreparedData:
+    data: pd.DataFrame
+    causal_model: dowhy.CausalModel
+    identified_estimand: IdentifiedEstimand
+    # categories of the string columns encoded as codes, indexed by code
+    encodings: Dict[str, List] = field(default_factory=dict)
+
+
+# per process cache of the prepared data, shared by the estimators of a population, treatment, outcome and model
+prepared_data_cache = LRUCache(
+    config.get_prepared_data_cache_max_bytes(),
+    sizeof=lambda prepared_data: dataframe_nbytes(prepared_data.data),
+)
+
+# per process cache of an empty causal model and its identified estimand for each graph,
+# parsing the graph and identifying the effect don't depend on the population rows
+causal_model_cache = LRUCache(256, sizeof=lambda _: 1)
+
+
+def __get_required_columns(population_specs, treatment_specs, outcome_specs, model_specs):
+    """
+    Union of the columns that the specifications use for each dataframe,
+    so the storage only needs to load those
+    """
+    shared_columns = (
+        [treatment.variable for treatment in treatment_specs]
+        + [outcome.variable for outcome in outcome_specs]
+        + [variable for model in model_specs for variable in model.confounders + model.effect_modifiers]
+    )
+
+    required_columns = {}
+    for population_spec in population_specs:
+        columns = required_columns.setdefault(population_spec.dataframe, set(shared_columns))
+        if population_spec.variable is not None:
+            columns.add(population_spec.variable)
+
+    return {dataframe: list(columns) for dataframe, columns in required_columns.items()}
+
+
+def __load_population(storage_client, workspace_name, population_spec, columns) -> PopulationSpecDataFrame:
+    population = PopulationSpecDataFrame(
+        type=population_spec.type,
+        label=population_spec.label,
+        variable=population_spec.variable,
+    )
+
+    if storage_client is None:
+        population.dataframe = pd.DataFrame()
+        return population
+
+    population.dataset_id = storage_client.get_dataset_id(workspace_name, population_spec.dataframe)
+    # workers load referenced datasets from the shared storage, so they aren't pickled into every task
+    if config.get_dataset_handoff() == "reference":
+        population.dataset = storage_client.get_dataset_reference(workspace_name, population_spec.dataframe, columns)
+    if population.dataset is None:
+        population.dataframe = storage_client.read(workspace_name, population_spec.dataframe, columns=columns)
+
+    return population
+
+
+def get_population_dataframe(population: PopulationSpecDataFrame) -> pd.DataFrame:
+    if population.dataframe is None and population.dataset is not None:
+        return get_storage_client().read_reference(population.dataset)
+    return population.dataframe
 
 
 def get_tasks(
@@ -28,18 +102,18 @@ def get_tasks(
     estimator_specs,
 ):
 
+    required_columns = __get_required_columns(population_specs, treatment_specs, outcome_specs, model_specs)
+
     population_df_specs = []
     for population_spec in population_specs:
         if population_spec.dataframe is not None and isinstance(population_spec.dataframe, str):
             try:
                 population_df_specs.append(
-                    PopulationSpecDataFrame(
-                        type=population_spec.type,
-                        label=population_spec.label,
-                        dataframe=storage_client.read(workspace_name, population_spec.dataframe)
-                        if storage_client is not None
-                        else pd.DataFrame(),
-                        variable=population_spec.variable,
+                    __load_population(
+                        storage_client,
+                        workspace_name,
+                        population_spec,
+                        required_columns[population_spec.dataframe],
                     )
                 )
             except FileNotFoundError:
@@ -66,28 +140,75 @@ def get_tasks(
     ]
 
 
-def __prepare_data(population, treatment, outcome, confounders, effect_modifiers) -> pd.DataFrame:
-    data = population.dataframe
+def group_specifications(specifications: List[Specification], max_chunk_size: int) -> List[List[Specification]]:
+    """
+    Splits the specifications into chunks that share population, treatment, outcome and model,
+    so their data only needs to be prepared (and sent to the worker) once
+    """
+    groups: Dict[Tuple, List[Specification]] = {}
+    for specification in specifications:
+        key = (
+            # get_tasks creates a single population object per population spec
+            id(specification.population),
+            specification.treatment.variable,
+            specification.outcome.variable,
+            specification.model.label,
+            tuple(specification.model.confounders),
+            tuple(specification.model.effect_modifiers),
+            specification.model.causal_graph,
+        )
+        groups.setdefault(key, []).append(specification)
+
+    chunk_size = max(max_chunk_size, 1)
+    return [
+        specifications_group[start : start + chunk_size]
+        for specifications_group in groups.values()
+        for start in range(0, len(specifications_group), chunk_size)
+    ]
+
+
+def __is_string_column(column: pd.Series) -> bool:
+    if isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+        return True
+    return column.dtype == object and len(column) > 0 and isinstance(column.iloc[0], str)
 
-    variable = population.variable
-    if variable is not None:
-        data = data[data[variable] == 1]
 
-    causal_variables = [treatment, outcome] + confounders + effect_modifiers
-    population_data = data[causal_variables]
-    population_data = population_data.dropna()
+def __prepare_data(population, treatment, outcome, confounders, effect_modifiers) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Projects the population rows and causal variables in one step, then encodes string columns
+    as category codes (sorted like a LabelEncoder) and downcasts integer columns.
+    Returns the data and the categories of each encoded column, indexed by code
+    """
+    data = get_population_dataframe(population)
 
-    population_data[treatment] = population_data[treatment].astype(bool)
-    le = preprocessing.LabelEncoder()
+    rows = data[population.variable] == 1 if population.variable is not None else slice(None)
+    causal_variables = list(dict.fromkeys([treatment, outcome] + confounders + effect_modifiers))
+    # dropna already copied the selection, a shallow copy detaches it so columns can be replaced without warnings
+    population_data = data.loc[rows, causal_variables].dropna().copy(deep=False)
+
+    encodings = {}
+    string_columns = [var for var in causal_variables if var != treatment and __is_string_column(population_data[var])]
+    if len(string_columns) > 0:
+        categorical_data = population_data[string_columns].astype("category")
+        for var in string_columns:
+            # categorical columns keep their own category order and unused categories, a LabelEncoder sorts the present values
+            column = categorical_data[var].cat.remove_unused_categories()
+            column = column.cat.reorder_categories(sorted(column.cat.categories))
+            population_data[var] = column.cat.codes
+            encodings[var] = column.cat.categories.tolist()
+
+    # floats keep their precision, downcasting them would change the estimates
     for var in causal_variables:
-        if population_data[var].dtype == object and isinstance(population_data.iloc[0][var], str):
-            population_data[var] = le.fit_transform(population_data[var])
+        if var != treatment and var not in encodings and pd.api.types.is_integer_dtype(population_data[var].dtype):
+            population_data[var] = pd.to_numeric(population_data[var], downcast="integer")
+
+    population_data[treatment] = population_data[treatment].astype(bool)
 
-    return population_data, treatment, outcome
+    return population_data, encodings
 
 
 def __get_estimator_config(estimator, identified_estimand, causal_model):
-    causal_estimator = CausalEstimator()
+    causal_estimator = CausalEstimator(parallelism=True)
     if any(word in estimator.method_name for word in ["propensity", "econml"]):
         causal_estimator.model_classifier = causal_estimator.tune_classifier_model(identified_estimand, causal_model)
 
@@ -124,33 +245,130 @@ def __get_covariate_balance(estimator, estimate):
         return None
 
 
-def estimate_effect(specification: Specification, task_id=None):
-    population_data, treatment, outcome = __prepare_data(
-        specification.population,
+def __prepared_data_key(specification: Specification) -> Optional[Tuple]:
+    # the content hash identifies the dataset, populations loaded without one aren't cached
+    if specification.population.dataset_id is None:
+        return None
+    return (
+        specification.population.dataset_id,
+        specification.population.variable,
+        specification.treatment.variable,
+        specification.outcome.variable,
+        tuple(specification.model.confounders),
+        tuple(specification.model.effect_modifiers),
+        specification.model.causal_graph,
+    )
+
+
+def __create_graph_causal_model(
+    specification: Specification, population_data: pd.DataFrame
+) -> Tuple[dowhy.CausalModel, IdentifiedEstimand]:
+    """
+    Creates the causal model of the population data from the template of its graph,
+    the graph is only parsed and the effect only identified once per graph
+    """
+    key = (
         specification.treatment.variable,
         specification.outcome.variable,
+        tuple(specification.model.confounders),
+        tuple(specification.model.effect_modifiers),
+        specification.model.causal_graph,
+    )
+    template = causal_model_cache.get(key)
+    if template is None:
+        causal_model = dowhy.CausalModel(
+            data=population_data,
+            treatment=specification.treatment.variable,
+            outcome=specification.outcome.variable,
+            graph=specification.model.causal_graph,
+            identify_vars=True,
+        )
+        identified_estimand = causal_model.identify_effect(proceed_when_unidentifiable=True, optimize_backdoor=False)
+        # the template keeps the columns but not the rows or fitted estimators of the population it was created for
+        template_model = copy.copy(causal_model)
+        template_model._data = population_data.head(0).copy()
+        template_model._estimator_cache = {}
+        template = (template_model, identified_estimand)
+        causal_model_cache.put(key, template)
+
+    template_model, identified_estimand = template
+    causal_model = copy.copy(template_model)
+    causal_model._data = population_data
+    causal_model._estimator_cache = {}
+    return causal_model, copy.deepcopy(identified_estimand)
+
+
+def prepare_specification(specification: Specification) -> PreparedData:
+    """
+    Prepares the data, causal model and identified estimand of a specification,
+    reusing the ones prepared by this process for the same population, treatment, outcome and model
+    """
+    key = __prepared_data_key(specification)
+    prepared_data = prepared_data_cache.get(key) if key is not None else None
+    if prepared_data is not None:
+        return prepared_data
+
+    treatment = specification.treatment.variable
+    outcome = specification.outcome.variable
+    population_data, encodings = __prepare_data(
+        specification.population,
+        treatment,
+        outcome,
         specification.model.confounders,
         specification.model.effect_modifiers,
     )
 
-    causal_model = dowhy.CausalModel(
+    causal_model, identified_estimand = __create_graph_causal_model(specification, population_data)
+    prepared_data = PreparedData(
         data=population_data,
-        treatment=treatment,
-        outcome=outcome,
-        graph=specification.model.causal_graph,
-        identify_vars=True,
+        causal_model=causal_model,
+        identified_estimand=identified_estimand,
+        encodings=encodings,
+    )
+
+    if key is not None:
+        prepared_data_cache.put(key, prepared_data)
+        logging.debug(f"Prepared data cache miss: {prepared_data_cache.stats()}")
+    return prepared_data
+
+
+def __clone_causal_model(causal_model, identified_estimand):
+    # estimators add columns (e.g. propensity scores) to the model data and cache themselves in the model,
+    # so each estimate gets a shallow copy of the data, its own estimator cache and its own estimand
+    clone = copy.copy(causal_model)
+    clone._data = causal_model._data.copy(deep=False)
+    clone._estimator_cache = {}
+    return clone, copy.deepcopy(identified_estimand)
+
+
+def estimate_effect(
+    specification: Specification,
+    task_id=None,
+    prepared_data: Optional[PreparedData] = None,
+):
+    """
+    Estimates the effect of a specification, the data prepared for another specification
+    with the same population, treatment, outcome and model can be reused
+    """
+    if prepared_data is None:
+        prepared_data = prepare_specification(specification)
+    # the prepared causal model may be shared, estimates always work on a clone
+    causal_model, identified_estimand = __clone_causal_model(
+        prepared_data.causal_model, prepared_data.identified_estimand
     )
 
-    identified_estimand = causal_model.identify_effect(proceed_when_unidentifiable=True, optimize_backdoor=False)
     if identified_estimand.estimands["backdoor"] is None:
         return None
 
     estimator_config = __get_estimator_config(specification.estimator, identified_estimand, causal_model)
-    estimate = causal_model.estimate_effect(
-        identified_estimand,
-        method_name=estimator_config["method_name"],
-        method_params=estimator_config["method_params"],
-    )
+    # econml forests parallelize through joblib, on threads (as the nuisance model search) their n_jobs
+    # stay within the task cpu budget instead of starting a loky process pool per worker process
+    with parallel_backend("threading", n_jobs=config.get_task_cpu_budget()):
+        estimate = causal_model.estimate_effect(
+            identified_estimand,
+            method_name=estimator_config["method_name"],
+            method_params=estimator_config["method_params"],
+        )
     # TODO: temporary fix until we update to the new dowhy API
     estimate.__method_name = estimator_config["method_name"]
     estimate.__method_params = estimator_config["method_params"]
@@ -161,15 +379,17 @@ def estimate_effect(specification: Specification, task_id=None):
         id=task_id if task_id is not None else str(uuid4()),
         population_type=specification.population.type,
         population_name=specification.population.label,
-        population_size=population_data.shape[0],
+        population_size=causal_model._data.shape[0],
         treatment_type=specification.treatment.type,
         treatment=specification.treatment.label,
         outcome_type=specification.outcome.type,
         outcome=specification.outcome.label,
         causal_model=specification.model.label,
         estimator=specification.estimator.label,
+        estimated_effect=estimate.value,
         causal_model_graph=causal_model,
         identified_estimand=identified_estimand,
         estimate=estimate,
         covariate_balance=covariate_balance,
+        encodings=prepared_data.encodings,
     )
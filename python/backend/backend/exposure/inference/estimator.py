@@ -6,9 +6,62 @@
 import copy
 from typing import Dict
 
-from sklearn.model_selection import GridSearchCV, KFold, StratifiedKFold
+from joblib import parallel_backend
+from sklearn.base import BaseEstimator, clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, KFold, StratifiedKFold, train_test_split
 from xgboost import XGBClassifier, XGBRegressor
 
+from backend.exposure import config
+from backend.exposure.inference.tuning_cache import get_best_params
+from backend.worker_commons.config import get_task_cpu_budget
+
+PARAM_GRID = {"max_depth": [3, 5], "colsample_bytree": [0.5, 0.8, 1.0]}
+
+CV_SPLITS = 3
+
+
+class EarlyStoppingSearch(BaseEstimator):
+    """
+    Runs a hyperparameter search, then picks n_estimators for the best params
+    with xgboost early stopping on a holdout of the data
+    """
+
+    def __init__(
+        self,
+        search=None,
+        max_n_estimators=500,
+        early_stopping_rounds=10,
+        validation_fraction=0.2,
+        stratify=False,
+        random_state=42,
+    ):
+        self.search = search
+        self.max_n_estimators = max_n_estimators
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.stratify = stratify
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        search = clone(self.search).fit(X, y)
+        X_train, X_validation, y_train, y_validation = train_test_split(
+            X,
+            y,
+            test_size=self.validation_fraction,
+            random_state=self.random_state,
+            stratify=y if self.stratify else None,
+        )
+        model = clone(search.estimator).set_params(
+            **search.best_params_,
+            n_estimators=self.max_n_estimators,
+            early_stopping_rounds=self.early_stopping_rounds,
+        )
+        model.fit(X_train, y_train, eval_set=[(X_validation, y_validation)], verbose=False)
+
+        self.best_params_ = {**search.best_params_, "n_estimators": model.best_iteration + 1}
+        return self
+
 
 class CausalEstimator:
     """
@@ -16,13 +69,20 @@ class CausalEstimator:
     using a format expected by DoWhy
     """
 
-    def __init__(self, classifier=None, regressor=None, parallelism=False):
+    def __init__(self, classifier=None, regressor=None, parallelism=False, cpu_budget=None):
         """
         Create default xgboost classifier and regressor models
         that could be used at different stages of an estimator.
-        Using grid search to auto tune hyperparameters for these models.
+        Using grid search (or successive halving, see TUNING_SEARCH_MODE)
+        to auto tune hyperparameters for these models.
+        With parallelism the models use up to cpu_budget cores (the task cpu budget by default).
         """
         self.parallelism = parallelism
+        self.cpu_budget = max(cpu_budget or get_task_cpu_budget(), 1) if parallelism else 1
+        # the grid search fits run concurrently and share the budget, the tuned models get all of it
+        n_fits = CV_SPLITS * len(PARAM_GRID["max_depth"]) * len(PARAM_GRID["colsample_bytree"])
+        self.search_jobs = min(self.cpu_budget, n_fits)
+        search_threads = max(self.cpu_budget // self.search_jobs, 1)
 
         if classifier:
             self.model_classifier = classifier
@@ -32,20 +92,17 @@ class CausalEstimator:
                 "learning_rate": 0.1,
                 "n_estimators": 100,
                 "objective": "binary:logistic",
-                "nthread": -1 if parallelism else 1,
+                "nthread": self.cpu_budget,
                 "use_label_encoder": False,
                 "random_state": 42,
                 "verbosity": 0,
             }
             self.default_model_classifier = XGBClassifier(max_depth=3, **self.classifier_kwargs)
-            self.model_classifier = GridSearchCV(
-                estimator=XGBClassifier(**self.classifier_kwargs),
-                param_grid={"max_depth": [3, 5], "colsample_bytree": [0.5, 0.8, 1.0]},
-                cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
-                n_jobs=1,
+            self.model_classifier = self.__create_search(
+                estimator=XGBClassifier(**{**self.classifier_kwargs, "nthread": search_threads}),
+                cv=StratifiedKFold(n_splits=CV_SPLITS, shuffle=True, random_state=42),
                 scoring="neg_log_loss",
-                refit=False,
-                verbose=0,
+                stratify=True,
             )
 
         if regressor:
@@ -56,21 +113,18 @@ class CausalEstimator:
                 "learning_rate": 0.1,
                 "n_estimators": 100,
                 "objective": "reg:squarederror",
-                "nthread": -1 if parallelism else 1,
+                "nthread": self.cpu_budget,
                 "random_state": 42,
                 "verbosity": 0,
             }
 
             self.default_model_regressor = XGBRegressor(max_depth=3, **self.regressor_kwargs)
 
-            self.model_regressor = GridSearchCV(
-                estimator=XGBRegressor(**self.regressor_kwargs),
-                param_grid={"max_depth": [3, 5], "colsample_bytree": [0.5, 0.8, 1.0]},
-                cv=KFold(n_splits=3, shuffle=True, random_state=42),
-                n_jobs=1,
+            self.model_regressor = self.__create_search(
+                estimator=XGBRegressor(**{**self.regressor_kwargs, "nthread": search_threads}),
+                cv=KFold(n_splits=CV_SPLITS, shuffle=True, random_state=42),
                 scoring="neg_mean_squared_error",
-                refit=False,
-                verbose=0,
+                stratify=False,
             )
 
         self.estimator_configurators = {
@@ -84,6 +138,36 @@ class CausalEstimator:
             "backdoor.linear_regression": "config_default",
         }
 
+    def __create_search(self, estimator, cv, scoring, stratify):
+        if config.get_tuning_search_mode() != "halving":
+            return GridSearchCV(
+                estimator=estimator,
+                param_grid=PARAM_GRID,
+                cv=cv,
+                n_jobs=self.search_jobs,
+                scoring=scoring,
+                refit=False,
+                verbose=0,
+            )
+
+        # candidates are fitted on growing subsamples, only the best third moves on to the next round
+        return EarlyStoppingSearch(
+            search=HalvingGridSearchCV(
+                estimator=estimator,
+                param_grid=PARAM_GRID,
+                factor=3,
+                resource="n_samples",
+                min_resources="exhaust",
+                cv=cv,
+                n_jobs=self.search_jobs,
+                scoring=scoring,
+                refit=False,
+                random_state=42,
+                verbose=0,
+            ),
+            stratify=stratify,
+        )
+
     def config_estimator(self, estimator_spec: Dict) -> Dict:
         config_method = self.estimator_configurators.get(estimator_spec["method_name"])
         if config_method is None:
@@ -125,12 +209,12 @@ class CausalEstimator:
 
     def config_forest_double_machine_learning(self, estimator_spec: Dict) -> Dict:
         estimator_spec = self.config_double_machine_learning(estimator_spec)
-        estimator_spec["method_params"]["init_params"]["n_jobs"] = -1 if self.parallelism else None
+        estimator_spec["method_params"]["init_params"]["n_jobs"] = self.cpu_budget if self.parallelism else None
         return estimator_spec
 
     def config_forest_doubly_robust(self, estimator_spec: Dict) -> Dict:
         estimator_spec = self.config_doubly_robust(estimator_spec)
-        estimator_spec["method_params"]["init_params"]["n_jobs"] = -1 if self.parallelism else None
+        estimator_spec["method_params"]["init_params"]["n_jobs"] = self.cpu_budget if self.parallelism else None
         return estimator_spec
 
     def config_propensity_weighting(self, estimator_spec: Dict) -> Dict:
@@ -179,6 +263,11 @@ class CausalEstimator:
         estimator_spec["method_params"] = {}
         return estimator_spec
 
+    def __get_best_params(self, search, training_data, features, target):
+        # threads instead of loky processes, xgboost releases the GIL and the fits stay within the task cpu budget
+        with parallel_backend("threading", n_jobs=self.search_jobs):
+            return get_best_params(search, training_data, features, target)
+
     def tune_classifier_model(self, identified_estimand, causal_model):
         """
         Tune hyperparameters for propensity model
@@ -188,10 +277,10 @@ class CausalEstimator:
             treatment_var = identified_estimand.treatment_variable
             variables = observed_common_causes + treatment_var
             training_data = causal_model._data[variables].drop_duplicates()
-            best_params = self.model_classifier.fit(
-                training_data[observed_common_causes], training_data[treatment_var]
-            ).best_params_
-            best_model = XGBClassifier(**best_params, **self.classifier_kwargs)
+            best_params = self.__get_best_params(
+                self.model_classifier, training_data, observed_common_causes, treatment_var
+            )
+            best_model = XGBClassifier(**{**self.classifier_kwargs, **best_params})
             return best_model
         else:
             return self.default_model_classifier
@@ -205,10 +294,10 @@ class CausalEstimator:
             outcome_var = identified_estimand.outcome_variable
             variables = observed_common_causes + outcome_var
             training_data = causal_model._data[variables].drop_duplicates()
-            best_params = self.model_regressor.fit(
-                training_data[observed_common_causes], training_data[outcome_var]
-            ).best_params_
-            best_model = XGBRegressor(**best_params, **self.regressor_kwargs)
+            best_params = self.__get_best_params(
+                self.model_regressor, training_data, observed_common_causes, outcome_var
+            )
+            best_model = XGBRegressor(**{**self.regressor_kwargs, **best_params})
             return best_model
         else:
             return self.default_model_regressor
@@ -224,8 +313,8 @@ class CausalEstimator:
             features = observed_common_causes + treatment_var
             variables = features + outcome_var
             training_data = causal_model._data[variables].drop_duplicates()
-            best_params = self.model_regressor.fit(training_data[features], training_data[outcome_var]).best_params_
-            best_model = XGBRegressor(**best_params, **self.regressor_kwargs)
+            best_params = self.__get_best_params(self.model_regressor, training_data, features, outcome_var)
+            best_model = XGBRegressor(**{**self.regressor_kwargs, **best_params})
             return best_model
         else:
             return self.default_model_regressor
@@ -7,16 +7,17 @@ import numpy as np
 import pandas as pd
 
 from backend.exposure.inference.estimator import CausalEstimator
+from backend.exposure.inference.tuning_cache import get_fitted_model
 from backend.exposure.model.significance_test_models import ComputeNullEffectSpec
 
 
 def __get_propensity_scores(identified_estimand, causal_model, common_causes):
     treatment_var = identified_estimand.treatment_variable
-    propensity_model = CausalEstimator().tune_classifier_model(identified_estimand, causal_model)
-
-    propensity_model.fit(
-        causal_model._data[common_causes],
-        causal_model._data[treatment_var],
+    propensity_model = get_fitted_model(
+        CausalEstimator(parallelism=True).tune_classifier_model(identified_estimand, causal_model),
+        causal_model._data,
+        common_causes,
+        treatment_var,
     )
 
     return pd.Series(propensity_model.predict_proba(causal_model._data[common_causes])[:, 1])
@@ -0,0 +1,101 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from backend.exposure import config
+from backend.worker_commons.cache import LRUCache
+from backend.worker_commons.io.db import get_db_client
+
+# bump when the tuning code changes in a way that changes the results
+TUNING_CACHE_VERSION = 1
+
+# params that change how a model is trained but not what it learns
+EXECUTION_PARAMS = {"n_jobs", "nthread", "verbose", "verbosity", "pre_dispatch"}
+
+# per process copy of the tuned params, entries are tiny so the budget counts entries
+_best_params_cache = LRUCache(1024, sizeof=lambda _: 1)
+
+
+def __describe(model: Any) -> Dict:
+    params = model.get_params(deep=True)
+    return {
+        "type": type(model).__name__,
+        "params": {
+            name: __describe(value) if hasattr(value, "get_params") else value
+            for name, value in params.items()
+            if name.split("__")[-1] not in EXECUTION_PARAMS
+        },
+    }
+
+
+def __get_key(kind: str, model: Any, data: pd.DataFrame, features: List[str], target: List[str]) -> str:
+    content_hash = hashlib.sha256()
+    content_hash.update(pd.util.hash_pandas_object(data[features + target], index=False).values.tobytes())
+    description = {
+        "version": TUNING_CACHE_VERSION,
+        "features": features,
+        "target": target,
+        "model": __describe(model),
+    }
+    content_hash.update(json.dumps(description, sort_keys=True, default=str).encode())
+    return f"{kind}:{content_hash.hexdigest()}"
+
+
+def __get_cached(key: str) -> Any:
+    try:
+        return get_db_client().get_value(key)
+    except Exception as error:
+        # e.g. inference running outside the backend (notebooks) without redis
+        logging.warning(f"Tuning cache unavailable: {error}")
+        return None
+
+
+def __set_cached(key: str, value: Any) -> None:
+    try:
+        get_db_client().set_value(key, value, expire_after=config.get_tuning_cache_expires_after())
+    except Exception as error:
+        logging.warning(f"Tuning cache unavailable: {error}")
+
+
+def get_best_params(search: Any, data: pd.DataFrame, features: List[str], target: List[str]) -> Dict:
+    """
+    Returns the best params the search finds for the data,
+    searches with the same space on the same data (e.g. from other specs or stages) are only run once
+    """
+    if not config.get_tuning_cache_enabled():
+        return search.fit(data[features], data[target]).best_params_
+
+    key = __get_key("tuning", search, data, features, target)
+    best_params = _best_params_cache.get(key)
+    if best_params is None:
+        best_params = __get_cached(key)
+        if best_params is None:
+            best_params = search.fit(data[features], data[target]).best_params_
+            __set_cached(key, best_params)
+        _best_params_cache.put(key, best_params)
+
+    return dict(best_params)
+
+
+def get_fitted_model(model: Any, data: pd.DataFrame, features: List[str], target: List[str]) -> Any:
+    """
+    Returns the model fitted on the data, reusing a previous fit of the same model on the same data
+    """
+    if not config.get_tuning_cache_enabled() or not config.get_tuning_cache_fitted_models():
+        return model.fit(data[features], data[target])
+
+    key = __get_key("fitted_model", model, data, features, target)
+    fitted_model = __get_cached(key)
+    if fitted_model is None:
+        fitted_model = model.fit(data[features], data[target])
+        __set_cached(key, fitted_model)
+
+    return fitted_model
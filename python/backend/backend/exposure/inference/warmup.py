@@ -0,0 +1,42 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import dowhy
+import numpy as np
+import pandas as pd
+
+from backend.exposure.inference.estimator import CausalEstimator
+
+WARMUP_ROWS = 200
+
+
+def warmup():
+    """
+    Estimates a small synthetic effect through the same dowhy, econml and xgboost code paths as the tasks,
+    so the first task of a worker process doesn't pay for their lazy initialization
+    """
+    random = np.random.default_rng(42)
+    confounder = random.normal(size=WARMUP_ROWS)
+    treatment = confounder + random.normal(size=WARMUP_ROWS) > 0
+    data = pd.DataFrame(
+        {
+            "confounder": confounder,
+            "treatment": treatment,
+            "outcome": 2 * treatment + confounder + random.normal(size=WARMUP_ROWS),
+        }
+    )
+
+    causal_model = dowhy.CausalModel(data=data, treatment="treatment", outcome="outcome", common_causes=["confounder"])
+    identified_estimand = causal_model.identify_effect(proceed_when_unidentifiable=True)
+
+    causal_estimator = CausalEstimator()
+    causal_estimator.model_classifier = causal_estimator.default_model_classifier
+    causal_estimator.model_regressor = causal_estimator.default_model_regressor
+    estimator_config = causal_estimator.config_estimator({"method_name": "backdoor.econml.dml.LinearDML"})
+    causal_model.estimate_effect(
+        identified_estimand,
+        method_name=estimator_config["method_name"],
+        method_params=estimator_config["method_params"],
+    )
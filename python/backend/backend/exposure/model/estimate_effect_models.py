@@ -11,6 +11,8 @@ from dowhy.causal_estimator import CausalEstimate
 from dowhy.causal_identifier import IdentifiedEstimand
 from pydantic import BaseModel
 
+from backend.worker_commons.io.storage import DatasetReference
+
 
 class PopulationSpec(BaseModel):
     type: str
@@ -20,7 +22,11 @@ class PopulationSpec(BaseModel):
 
 
 class PopulationSpecDataFrame(PopulationSpec):
-    dataframe: pd.DataFrame
+    # either the dataframe itself, or a reference the worker loads it from
+    dataframe: Optional[pd.DataFrame] = None
+    dataset: Optional[DatasetReference] = None
+    # identifies the content of the dataframe, None if the storage doesn't know it
+    dataset_id: Optional[str] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -84,6 +90,19 @@ class EstimateEffectRequestBody(BaseModel):
     estimator_specs: List[EstimatorSpec]
 
 
+class EstimateArtifacts(BaseModel):
+    """
+    The dowhy objects behind an estimate, only loaded by the tasks that need them (e.g. refuters)
+    """
+
+    causal_model_graph: CausalModel
+    identified_estimand: IdentifiedEstimand
+    estimate: CausalEstimate
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
 class EstimateResult(BaseModel):
     id: str
     population_type: str
@@ -95,11 +114,17 @@ class EstimateResult(BaseModel):
     outcome: str
     causal_model: str
     estimator: str
+    estimated_effect: Optional[float] = None
+    # stored results only keep a reference to their artifacts, results created in process embed them
+    artifacts_id: Optional[str] = None
     causal_model_graph: CausalModel = None
     identified_estimand: IdentifiedEstimand = None
     estimate: CausalEstimate = None
     covariate_balance: Optional[Dict[str, Any]] = None
+    # labels of the string variables encoded as codes, indexed by code
+    encodings: Optional[Dict[str, List[Any]]] = None
     exc_info: Optional[str] = None
+    timed_out: bool = False
 
     def to_dict(self):
         default_info = {
@@ -118,11 +143,13 @@ class EstimateResult(BaseModel):
             return {
                 **default_info,
                 "exc_info": self.exc_info,
+                "timed_out": self.timed_out,
             }
         return {
             **default_info,
-            "estimated_effect": self.estimate.value,
+            "estimated_effect": self.estimated_effect if self.estimated_effect is not None else self.estimate.value,
             "covariate_balance": self.covariate_balance,
+            "encodings": self.encodings,
         }
 
     class Config:
@@ -45,6 +45,8 @@ class StatusModel(BaseModel):
             SignificanceTestResult,
         ]
     ] = None
+    # position in the list of finished results, clients send it back to only get newer results
+    cursor: Optional[int] = None
 
     def to_dict(self):
         return {
@@ -56,6 +58,7 @@ class StatusModel(BaseModel):
             if isinstance(self.results, list)
             else self.results.to_dict(),
             "failures": [failure.to_dict() for failure in self.failures],
+            "cursor": self.cursor,
         }
 
 
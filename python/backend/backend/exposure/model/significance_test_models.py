@@ -3,6 +3,8 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
+from typing import Optional
+
 from dowhy import CausalModel
 from dowhy.causal_estimator import CausalEstimate
 from dowhy.causal_identifier import IdentifiedEstimand
@@ -21,9 +23,11 @@ class ComputeNullEffectSpec(BaseModel):
 
 class PropensityScoreSpec(BaseModel):
     estimate_id: str
-    identified_estimand: IdentifiedEstimand
-    causal_model: CausalModel
-    estimate: CausalEstimate
+    # either the estimate artifacts id, or the artifacts themselves
+    artifacts_id: Optional[str] = None
+    identified_estimand: Optional[IdentifiedEstimand] = None
+    causal_model: Optional[CausalModel] = None
+    estimate: Optional[CausalEstimate] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -9,11 +9,13 @@ import celery
 
 from backend.exposure.inference.confidence_interval import estimate_confidence_intervals
 from backend.exposure.model.confidence_interval_models import ConfidenceIntervalParams, ConfidenceIntervalResult
+from backend.exposure.worker.estimate_artifacts import with_artifacts
+from backend.exposure.worker.group_progress import record_task_finished
 from backend.worker_commons.io.db import get_db_client
 from backend.worker_commons.worker import backend_worker
 
 
-@backend_worker.task
+@backend_worker.task(ignore_result=True)
 def confidence_interval_task(
     specification: ConfidenceIntervalParams,
 ) -> ConfidenceIntervalResult:
@@ -21,20 +23,21 @@ def confidence_interval_task(
     estimated_effect = specification.estimate
 
     if specification.estimate.exc_info is not None:
-        return ConfidenceIntervalResult(
+        result = ConfidenceIntervalResult(
             estimate_id=estimated_effect.id,
             exc_info=specification.estimate.exc_info,
         )
-
-    try:
-        result = estimate_confidence_intervals(estimated_effect)
-    except Exception as exc:
-        logging.error("Failed to estimate confidence intervals")
-        return ConfidenceIntervalResult(
-            estimate_id=estimated_effect.id,
-            exc_info=str(exc),
-        )
+    else:
+        try:
+            result = estimate_confidence_intervals(with_artifacts(estimated_effect))
+        except Exception as exc:
+            logging.error("Failed to estimate confidence intervals")
+            result = ConfidenceIntervalResult(
+                estimate_id=estimated_effect.id,
+                exc_info=str(exc),
+            )
 
     db_client.set_value(celery.current_task.request.id, result)
+    record_task_finished(celery.current_task.request.id, failed=result.exc_info is not None)
 
     return result
@@ -0,0 +1,72 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+from typing import Optional
+
+from backend.exposure.model.estimate_effect_models import EstimateArtifacts, EstimateResult
+from backend.worker_commons import config
+from backend.worker_commons.io.db import get_db_client
+
+
+def __artifacts_key(artifacts_id: str) -> str:
+    return f"estimate_artifacts:{artifacts_id}"
+
+
+def store_estimate(result_id: str, result: Optional[EstimateResult]) -> Optional[EstimateResult]:
+    """
+    Stores the result summary under its id and the dowhy objects separately,
+    so polls and downstream tasks only move the summary. Returns the stored summary
+    """
+    db_client = get_db_client()
+    if result is None or result.estimate is None:
+        db_client.set_value(result_id, result)
+        return result
+
+    artifacts = EstimateArtifacts(
+        causal_model_graph=result.causal_model_graph,
+        identified_estimand=result.identified_estimand,
+        estimate=result.estimate,
+    )
+    summary = result.copy(
+        update={
+            "artifacts_id": result.id,
+            "causal_model_graph": None,
+            "identified_estimand": None,
+            "estimate": None,
+        }
+    )
+    db_client.set_many({result_id: summary, __artifacts_key(result.id): artifacts})
+    return summary
+
+
+def load_artifacts(artifacts_id: str) -> Optional[EstimateArtifacts]:
+    return get_db_client().get_value(__artifacts_key(artifacts_id))
+
+
+def with_artifacts(result: EstimateResult) -> EstimateResult:
+    """
+    Returns the result with its artifacts loaded back in, as expected by the inference functions.
+    Results whose artifacts expired are returned unchanged
+    """
+    if result.artifacts_id is None or result.estimate is not None:
+        return result
+
+    artifacts = load_artifacts(result.artifacts_id)
+    if artifacts is None:
+        return result
+    return result.copy(
+        update={
+            "causal_model_graph": artifacts.causal_model_graph,
+            "identified_estimand": artifacts.identified_estimand,
+            "estimate": artifacts.estimate,
+        }
+    )
+
+
+def refresh_artifacts(artifacts_id: str) -> bool:
+    """
+    Extends the artifacts lifetime for a new result referencing them, returns False if they already expired
+    """
+    return get_db_client().expire(__artifacts_key(artifacts_id), config.get_default_expires_after())
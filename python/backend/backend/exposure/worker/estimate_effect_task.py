@@ -4,39 +4,173 @@
 #
 
 import logging
+import signal
+import threading
+from contextlib import nullcontext
+from typing import List, Optional
 
 import celery
+from celery.exceptions import SoftTimeLimitExceeded
 
-from backend.exposure.inference.estimate_effect import estimate_effect
+from backend.exposure.inference.estimate_effect import estimate_effect, prepare_specification
 from backend.exposure.model.estimate_effect_models import EstimateResult, Specification
+from backend.exposure.worker.estimate_artifacts import store_estimate
+from backend.exposure.worker.estimate_memo import get_memo_key, get_memoized_estimate, memoize_estimate
+from backend.exposure.worker.group_progress import record_task_finished
 from backend.worker_commons.io.db import get_db_client
 from backend.worker_commons.worker import backend_worker
 
 
-@backend_worker.task
-def estimate_effect_for_specification(
+class EstimatorTimer:
+    """
+    Soft time limit for a single estimate of a chunk task, raises SoftTimeLimitExceeded once the seconds elapse.
+    Only available in the main thread of the pool process, as celery's own soft limit
+    """
+
+    def __init__(self, seconds: Optional[int]):
+        self.seconds = seconds
+        self.expired = False
+        self._armed = False
+        self._previous_handler = None
+
+    def _expire(self, signum, frame):
+        self.expired = True
+        raise SoftTimeLimitExceeded()
+
+    def __enter__(self):
+        self._armed = (
+            self.seconds is not None
+            and self.seconds > 0
+            and hasattr(signal, "SIGALRM")
+            and threading.current_thread() is threading.main_thread()
+        )
+        if self._armed:
+            self._previous_handler = signal.signal(signal.SIGALRM, self._expire)
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+        return False
+
+
+def __failed_result(specification: Specification, result_id: str, exc_info: str, timed_out=False) -> EstimateResult:
+    return EstimateResult(
+        id=result_id,
+        population_type=specification.population.type,
+        population_name=specification.population.label,
+        population_size=len(specification.population.dataframe)
+        if specification.population.dataframe is not None
+        else 0,
+        treatment_type=specification.treatment.type,
+        treatment=specification.treatment.label,
+        outcome_type=specification.outcome.type,
+        outcome=specification.outcome.label,
+        causal_model=specification.model.label,
+        estimator=specification.estimator.label,
+        exc_info=exc_info,
+        timed_out=timed_out,
+    )
+
+
+def __save_result(specification: Specification, result_id: str, result: Optional[EstimateResult]) -> EstimateResult:
+    result = store_estimate(result_id, result)
+    memo_key = get_memo_key(specification)
+    if memo_key is not None:
+        memoize_estimate(memo_key, result)
+    record_task_finished(result_id, failed=result is None or result.exc_info is not None)
+
+    return result
+
+
+def __store_estimate(
     specification: Specification,
+    result_id: str,
+    prepared_data=None,
+    timer: Optional[EstimatorTimer] = None,
 ) -> EstimateResult:
-    db_client = get_db_client()
-
     try:
-        result = estimate_effect(specification=specification, task_id=celery.current_task.request.id)
+        with timer or nullcontext():
+            result = estimate_effect(
+                specification=specification,
+                task_id=result_id,
+                prepared_data=prepared_data,
+            )
+    except SoftTimeLimitExceeded:
+        logging.error(f"Estimate {result_id} with {specification.estimator.method_name} exceeded its time limit")
+        result = __failed_result(specification, result_id, "Estimate exceeded its time limit", timed_out=True)
     except Exception as exc:
         logging.error("Failed to estimate effect")
-        result = EstimateResult(
-            id=celery.current_task.request.id,
-            population_type=specification.population.type,
-            population_name=specification.population.label,
-            population_size=len(specification.population.dataframe),
-            treatment_type=specification.treatment.type,
-            treatment=specification.treatment.label,
-            outcome_type=specification.outcome.type,
-            outcome=specification.outcome.label,
-            causal_model=specification.model.label,
-            estimator=specification.estimator.label,
-            exc_info=str(exc),
-        )
+        result = __failed_result(specification, result_id, str(exc))
+
+    return __save_result(specification, result_id, result)
 
-    db_client.set_value(celery.current_task.request.id, result)
 
+def __store_memoized_estimate(specification: Specification, result_id: str) -> Optional[EstimateResult]:
+    memo_key = get_memo_key(specification)
+    result = get_memoized_estimate(memo_key, specification, result_id) if memo_key is not None else None
+    if result is None:
+        return None
+
+    logging.info(f"Reusing the estimate memoized as {memo_key} for {result_id}")
+    get_db_client().set_value(result_id, result)
+    record_task_finished(result_id, failed=False)
     return result
+
+
+@backend_worker.task(ignore_result=True)
+def estimate_effect_for_specification(
+    specification: Specification,
+) -> EstimateResult:
+    result_id = celery.current_task.request.id
+    return __store_memoized_estimate(specification, result_id) or __store_estimate(specification, result_id)
+
+
+@backend_worker.task(ignore_result=True)
+def estimate_effect_for_specifications(
+    specifications: List[Specification],
+    result_ids: List[str],
+    soft_time_limits: Optional[List[int]] = None,
+) -> List[str]:
+    """
+    Estimates a chunk of specifications that share population, treatment, outcome and model,
+    the data is prepared and the effect identified once for the whole chunk.
+    Each estimate is stopped after its own soft time limit, so one slow estimator doesn't use up the chunk
+    """
+    soft_time_limits = soft_time_limits or [None] * len(specifications)
+    pending = [
+        (specification, result_id, soft_time_limit)
+        for specification, result_id, soft_time_limit in zip(specifications, result_ids, soft_time_limits)
+        if __store_memoized_estimate(specification, result_id) is None
+    ]
+    if len(pending) == 0:
+        return result_ids
+
+    timed_out = False
+    try:
+        prepared_data = prepare_specification(pending[0][0])
+    except SoftTimeLimitExceeded:
+        logging.error("Chunk exceeded its time limit while creating the shared causal model")
+        prepared_data, timed_out = None, True
+    except Exception:
+        # each specification retries on its own, so the error is reported with its result
+        logging.error("Failed to create the causal model shared by the chunk")
+        prepared_data = None
+
+    for specification, result_id, soft_time_limit in pending:
+        if timed_out:
+            # the soft limit is only raised once, the hard limit follows shortly after
+            __save_result(
+                specification,
+                result_id,
+                __failed_result(specification, result_id, "Chunk exceeded its time limit", timed_out=True),
+            )
+            continue
+        timer = EstimatorTimer(soft_time_limit)
+        result = __store_estimate(specification, result_id, prepared_data, timer)
+        # only the chunk's own limit stops the remaining estimates
+        timed_out = result is not None and result.timed_out and not timer.expired
+
+    return result_ids
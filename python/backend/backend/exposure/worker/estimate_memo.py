@@ -0,0 +1,92 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import hashlib
+import json
+from typing import Optional
+
+import dowhy
+import econml
+import numpy
+import pandas
+import sklearn
+import xgboost
+
+from backend.exposure import config
+from backend.exposure.model.estimate_effect_models import EstimateResult, Specification
+from backend.exposure.worker.estimate_artifacts import refresh_artifacts
+from backend.worker_commons.io.db import get_db_client
+
+# bump when the estimation code changes in a way that changes the results
+MEMO_VERSION = 2
+
+LIBRARY_VERSIONS = {
+    library.__name__: library.__version__ for library in [dowhy, econml, numpy, pandas, sklearn, xgboost]
+}
+
+
+def get_memo_key(specification: Specification) -> Optional[str]:
+    """
+    Hashes everything the estimate depends on, None when the content of the dataset isn't known
+    """
+    dataset_id = specification.population.dataset_id
+    if dataset_id is None or not config.get_estimate_memoization():
+        return None
+
+    content = {
+        "memo_version": MEMO_VERSION,
+        "libraries": LIBRARY_VERSIONS,
+        "dataset_id": dataset_id,
+        "population_variable": specification.population.variable,
+        "treatment": specification.treatment.variable,
+        "outcome": specification.outcome.variable,
+        "confounders": specification.model.confounders,
+        "effect_modifiers": specification.model.effect_modifiers,
+        "causal_graph": specification.model.causal_graph,
+        "estimator": {
+            "method_name": specification.estimator.method_name,
+            "method_params": specification.estimator.method_params,
+            "require_propensity_score": specification.estimator.require_propensity_score,
+            # the search picks the nuisance model params (and n_estimators when halving)
+            "tuning_search_mode": config.get_tuning_search_mode(),
+        },
+    }
+    content_hash = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+    return f"estimate_memo:{content_hash}"
+
+
+def get_memoized_estimate(memo_key: str, specification: Specification, result_id: str) -> Optional[EstimateResult]:
+    """
+    Returns a previous estimate of the same specification relabeled as result_id,
+    None if there is none or its artifacts expired
+    """
+    db_client = get_db_client()
+    summary = db_client.get_value(memo_key)
+    if summary is None or not refresh_artifacts(summary.artifacts_id):
+        return None
+    # entries that keep being reused stay cached, the others expire
+    db_client.expire(memo_key, config.get_estimate_memo_expires_after())
+
+    # labels aren't part of the key, so they come from the current specification
+    return summary.copy(
+        update={
+            "id": result_id,
+            "population_type": specification.population.type,
+            "population_name": specification.population.label,
+            "treatment_type": specification.treatment.type,
+            "treatment": specification.treatment.label,
+            "outcome_type": specification.outcome.type,
+            "outcome": specification.outcome.label,
+            "causal_model": specification.model.label,
+            "estimator": specification.estimator.label,
+        }
+    )
+
+
+def memoize_estimate(memo_key: str, summary: EstimateResult) -> None:
+    # failed estimates are computed again, they may have failed for transient reasons
+    if summary is None or summary.exc_info is not None or summary.artifacts_id is None:
+        return
+    get_db_client().set_value(memo_key, summary, expire_after=config.get_estimate_memo_expires_after())
@@ -0,0 +1,100 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import celery
+
+from backend.worker_commons.io.db import get_db_client
+from backend.worker_commons.io.events import group_events_channel, publish_event
+from backend.worker_commons.worker import backend_worker
+
+
+@dataclass
+class GroupProgress:
+    total: int
+    completed: int
+    failed: int
+    revoked: bool
+    finished_ids: List[str]
+    cursor: int
+
+
+def __counters_key(group_id: str) -> str:
+    return f"group_progress:{group_id}"
+
+
+def __finished_key(group_id: str) -> str:
+    return f"group_finished:{group_id}"
+
+
+def init_group_progress(group_id: str, total: int) -> None:
+    get_db_client().increment_counters(__counters_key(group_id), {"total": total, "completed": 0, "failed": 0})
+
+
+def record_task_finished(task_id: str, failed: bool) -> None:
+    """
+    Called by a group member once its result is stored,
+    the id is appended before the counters change, so a poll never reports
+    a finished group without all of its results
+    """
+    group_id = celery.current_task.request.group
+    if group_id is None:
+        return
+
+    db_client = get_db_client()
+    db_client.append_values(__finished_key(group_id), [task_id])
+    db_client.increment_counters(__counters_key(group_id), {"failed" if failed else "completed": 1})
+    publish_event(group_events_channel(group_id), task_id)
+
+
+def record_group_revoked(group_id: str) -> None:
+    get_db_client().increment_counters(__counters_key(group_id), {"revoked": 1})
+    publish_event(group_events_channel(group_id))
+
+
+@backend_worker.task(ignore_result=True)
+def record_task_failure(request, exc, traceback):
+    """
+    Errback for group members that failed without storing a result
+    (e.g. unhandled exceptions, time limits or lost workers)
+    """
+    logging.error(f"Task {request.id} from group {request.group} failed: {exc}")
+    if request.group is None:
+        return
+
+    db_client = get_db_client()
+    # chunked tasks hold several results, only the ones not recorded before the failure are lost.
+    # Results recorded before a late failure (e.g. while publishing) were already counted
+    result_ids = (request.kwargs or {}).get("result_ids") or [request.id]
+    finished_ids = set(db_client.get_values_from(__finished_key(request.group), 0))
+    failed = len([result_id for result_id in result_ids if result_id not in finished_ids])
+
+    if failed > 0:
+        db_client.increment_counters(__counters_key(request.group), {"failed": failed})
+        publish_event(group_events_channel(request.group), request.id)
+
+
+def get_group_progress(group_id: str, cursor: int = 0) -> Optional[GroupProgress]:
+    """
+    Returns the counters of the group and the ids that finished after the cursor,
+    None if the group was not scheduled with progress tracking
+    """
+    db_client = get_db_client()
+    counters = db_client.get_counters(__counters_key(group_id))
+    if "total" not in counters:
+        return None
+
+    finished_ids = db_client.get_values_from(__finished_key(group_id), cursor)
+    return GroupProgress(
+        total=counters["total"],
+        completed=counters.get("completed", 0),
+        failed=counters.get("failed", 0),
+        revoked=counters.get("revoked", 0) > 0,
+        finished_ids=finished_ids,
+        cursor=cursor + len(finished_ids),
+    )
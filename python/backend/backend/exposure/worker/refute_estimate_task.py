@@ -9,31 +9,37 @@ import celery
 
 from backend.exposure.inference.refutation import refute_estimate
 from backend.exposure.model.refute_estimate_models import RefuterResult, RefuterSpec
+from backend.exposure.worker.estimate_artifacts import with_artifacts
+from backend.exposure.worker.group_progress import record_task_finished
 from backend.worker_commons.io.db import get_db_client
 from backend.worker_commons.worker import backend_worker
 
 
-@backend_worker.task
+@backend_worker.task(ignore_result=True)
 def refute_estimate_task(
     specification: RefuterSpec,
 ) -> RefuterResult:
     db_client = get_db_client()
+    refuter = specification.method_name.replace("_refuter", "")
 
     if specification.estimate.exc_info is not None:
-        return RefuterResult(
-            estimate_id=specification.estimate_id,
+        result = RefuterResult(
+            estimate_id=specification.estimate.id,
+            refuter=refuter,
             exc_info=specification.estimate.exc_info,
         )
-
-    try:
-        result = refute_estimate(specification)
-    except Exception as exc:
-        logging.error("Failed to refute estimate")
-        return RefuterResult(
-            estimate_id=specification.estimate_id,
-            exc_info=str(exc),
-        )
+    else:
+        try:
+            result = refute_estimate(specification.copy(update={"estimate": with_artifacts(specification.estimate)}))
+        except Exception as exc:
+            logging.error("Failed to refute estimate")
+            result = RefuterResult(
+                estimate_id=specification.estimate.id,
+                refuter=refuter,
+                exc_info=str(exc),
+            )
 
     db_client.set_value(celery.current_task.request.id, result)
+    record_task_finished(celery.current_task.request.id, failed=result.exc_info is not None)
 
     return result
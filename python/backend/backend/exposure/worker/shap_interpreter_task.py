@@ -3,15 +3,18 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
+import logging
+
 import celery
 
 from backend.exposure.inference.specification_interpreter import interpret
 from backend.exposure.model.shap_interpreter_models import ListShapInterpreterResult, ShapInterpreterSpec
+from backend.exposure.worker.group_progress import record_task_finished
 from backend.worker_commons.io.db import get_db_client
 from backend.worker_commons.worker import backend_worker
 
 
-@backend_worker.task
+@backend_worker.task(ignore_result=True)
 def shap_interpreter_task(
     specification: ShapInterpreterSpec,
 ) -> ListShapInterpreterResult:
@@ -29,12 +32,10 @@ def shap_interpreter_task(
             ],
         )
     except Exception as exc:
-        print("Failed to interpret specification", exc_info=True)
-        return ListShapInterpreterResult(
-            estimate_id=specification.outcome_result.id,
-            exc_info=str(exc),
-        )
+        logging.error("Failed to interpret specification")
+        result = ListShapInterpreterResult(exc_info=str(exc))
 
     db_client.set_value(celery.current_task.request.id, result)
+    record_task_finished(celery.current_task.request.id, failed=result.exc_info is not None)
 
     return result
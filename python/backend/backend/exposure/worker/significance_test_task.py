@@ -11,19 +11,37 @@ from celery import group
 from backend.exposure import config
 from backend.exposure.inference.significance_test import compute_null_effect, get_propensity_scores
 from backend.exposure.model.significance_test_models import ComputeNullEffectSpec, PropensityScoreSpec
+from backend.exposure.worker.estimate_artifacts import load_artifacts
 from backend.worker_commons.io.db import get_db_client
+from backend.worker_commons.io.events import publish_event, task_events_channel
 from backend.worker_commons.worker import backend_worker
 
 
+def __specs_key(task_id: str) -> str:
+    return f"null_effect_specs:{task_id}"
+
+
 @backend_worker.task
 def compute_null_effects(specs: List[ComputeNullEffectSpec]):
-    group([__compute_null_effect.s(specs) for _ in range(config.get_significance_simulations())])()
+    # the specs are stored once, so the simulations only receive their key
+    specs_key = __specs_key(celery.current_task.request.id)
+    get_db_client().set_value(specs_key, specs)
+    group([__compute_null_effect.s(specs_key) for _ in range(config.get_significance_simulations())])()
 
 
 @backend_worker.task
 def calculate_propensity_score(
     specification: PropensityScoreSpec,
 ) -> ComputeNullEffectSpec:
+    if specification.artifacts_id is not None:
+        artifacts = load_artifacts(specification.artifacts_id)
+        if artifacts is None:
+            raise ValueError(f"Artifacts of estimate {specification.estimate_id} expired")
+        return get_propensity_scores(
+            artifacts.identified_estimand,
+            artifacts.causal_model_graph,
+            artifacts.estimate,
+        )
 
     return get_propensity_scores(
         specification.identified_estimand,
@@ -32,15 +50,16 @@ def calculate_propensity_score(
     )
 
 
-@backend_worker.task
-def __compute_null_effect(specifications: List[ComputeNullEffectSpec]):
+@backend_worker.task(ignore_result=True)
+def __compute_null_effect(specs_key: str):
     db_client = get_db_client()
 
-    result = compute_null_effect(specifications)
+    result = compute_null_effect(db_client.get_value(specs_key))
 
     db_client.set_value(
         f"{celery.current_task.request.parent_id}:{celery.current_task.request.id}",
         result,
     )
+    publish_event(task_events_channel(celery.current_task.request.parent_id))
 
     return result
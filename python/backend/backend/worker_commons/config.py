@@ -24,3 +24,94 @@ def get_default_expires_after():
         return timedelta(hours=int(expires_after))
     else:
         return timedelta(hours=8)
+
+
+def get_dataset_format():
+    return os.environ.get("DATASET_FORMAT", "arrow").strip().lower()
+
+
+def get_dataframe_cache_max_bytes():
+    return int(os.environ.get("DATAFRAME_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+
+def get_max_upload_size():
+    return int(os.environ.get("MAX_UPLOAD_SIZE_MB", 5 * 1024)) * 1024 * 1024
+
+
+def get_dataset_handoff():
+    # "inline" sends the dataframes inside the tasks, "reference" lets workers memory map them from the storage
+    return os.environ.get("DATASET_HANDOFF", "inline").strip().lower()
+
+
+def get_redis_max_connections():
+    return int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+
+
+def get_redis_pool_timeout():
+    return int(os.environ.get("REDIS_POOL_TIMEOUT_SECONDS", 20))
+
+
+def get_redis_health_check_interval():
+    return int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", 30))
+
+
+def get_result_compression():
+    return os.environ.get("RESULT_COMPRESSION", "zstd").strip().lower()
+
+
+def get_result_compression_min_bytes():
+    return int(os.environ.get("RESULT_COMPRESSION_MIN_BYTES", 64 * 1024))
+
+
+def get_api_threadpool_size():
+    return int(os.environ.get("API_THREADPOOL_SIZE", 40))
+
+
+def get_events_heartbeat():
+    return int(os.environ.get("EVENTS_HEARTBEAT_SECONDS", 15))
+
+
+def get_worker_prefetch_multiplier():
+    # long running tasks shouldn't be reserved by a busy process while others are idle
+    return int(os.environ.get("WORKER_PREFETCH_MULTIPLIER", 1))
+
+
+def get_worker_warmup_enabled():
+    return os.environ.get("WORKER_WARMUP", "true").strip().lower() == "true"
+
+
+def get_worker_warmup_modules():
+    # modules imported before the worker forks, the ones defining warmup() also run it in every child process.
+    # R (rpy2 and synthdid_simple.r) is only loaded by the api's events router, workers don't run it
+    modules = os.environ.get(
+        "WORKER_WARMUP_MODULES",
+        "econml.dml,econml.dr,dowhy.causal_estimators.econml,dowhy.causal_refuters,backend.exposure.inference.warmup",
+    )
+    return [module.strip() for module in modules.split(",") if module.strip()]
+
+
+def get_worker_warmup_timeout():
+    return int(os.environ.get("WORKER_WARMUP_TIMEOUT_SECONDS", 120))
+
+
+def get_worker_max_memory_per_child():
+    # in KiB as expected by celery, 0 disables the limit
+    return int(os.environ.get("WORKER_MAX_MEMORY_PER_CHILD_MB", 4 * 1024)) * 1024
+
+
+def get_prepared_data_cache_max_bytes():
+    return int(os.environ.get("PREPARED_DATA_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+
+def get_task_cpu_budget():
+    # cores a single task may use, by default the host cores are shared evenly by the worker processes
+    cpu_budget = os.environ.get("TASK_CPU_BUDGET")
+    if cpu_budget:
+        return max(int(cpu_budget), 1)
+    cpu_count = os.cpu_count() or 1
+    return max(cpu_count // int(os.environ.get("N_PARALLEL_JOBS", cpu_count)), 1)
+
+
+def get_storage_sweep_interval():
+    # seconds between removals of the stored files no workspace refers to anymore, 0 disables them
+    return int(os.environ.get("STORAGE_SWEEP_INTERVAL_MINUTES", 60)) * 60
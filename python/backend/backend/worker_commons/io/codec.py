@@ -0,0 +1,98 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import logging
+import pickle
+import struct
+from typing import Any, Dict, Optional
+
+import pyarrow as pa
+
+from backend.worker_commons import config
+
+# values are stored as MAGIC + codec id + uncompressed size + payload,
+# anything without the magic prefix is a plain pickle written before codecs existed
+MAGIC = b"SWC"
+HEADER = struct.Struct("<BQ")
+PICKLE_PROTOCOL = 5
+
+
+class Codec:
+    """
+    Compresses pickled payloads, codecs can be added with register_codec
+    """
+
+    def __init__(self, codec_id: int, name: str):
+        self.codec_id = codec_id
+        self.name = name
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes, size: int) -> bytes:
+        return data
+
+
+class ArrowCodec(Codec):
+    """
+    Uses the compression codecs bundled with pyarrow (e.g. zstd, lz4)
+    """
+
+    def __init__(self, codec_id: int, name: str):
+        super().__init__(codec_id, name)
+        self._codec = pa.Codec(name)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._codec.compress(data, asbytes=True)
+
+    def decompress(self, data: bytes, size: int) -> bytes:
+        return self._codec.decompress(data, decompressed_size=size, asbytes=True)
+
+
+_codecs_by_id: Dict[int, Codec] = {}
+_codecs_by_name: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    _codecs_by_id[codec.codec_id] = codec
+    _codecs_by_name[codec.name] = codec
+
+
+register_codec(Codec(0, "none"))
+for codec_id, name in [(1, "zstd"), (2, "lz4")]:
+    if pa.Codec.is_available(name):
+        register_codec(ArrowCodec(codec_id, name))
+
+
+def _get_compression_codec() -> Optional[Codec]:
+    name = config.get_result_compression()
+    codec = _codecs_by_name.get(name)
+    if codec is None:
+        logging.warning(f"Compression codec {name} not available, storing values uncompressed")
+    return codec
+
+
+def encode(value: Any) -> bytes:
+    data = pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+
+    codec = _codecs_by_name["none"]
+    payload = data
+    if len(data) >= config.get_result_compression_min_bytes():
+        compression_codec = _get_compression_codec()
+        compressed = compression_codec.compress(data) if compression_codec is not None else data
+        # keeps the raw pickle when compressing doesn't pay off
+        if len(compressed) < len(data):
+            codec, payload = compression_codec, compressed
+
+    return MAGIC + HEADER.pack(codec.codec_id, len(data)) + payload
+
+
+def decode(data: bytes) -> Any:
+    if not data.startswith(MAGIC):
+        return pickle.loads(data)
+
+    codec_id, size = HEADER.unpack_from(data, len(MAGIC))
+    payload = data[len(MAGIC) + HEADER.size :]
+    return pickle.loads(_codecs_by_id[codec_id].decompress(payload, size))
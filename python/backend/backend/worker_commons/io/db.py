@@ -3,15 +3,19 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
-import pickle
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Iterator, Union
+from typing import Any, Dict, Iterator, List, Union
 from urllib.parse import urlparse
 
 import redis
 from redis.typing import ExpiryT
 
 from backend.worker_commons import config
+from backend.worker_commons.io import codec
+
+MAX_KEYS_PER_REQUEST = 1000
 
 
 class Storage(ABC):
@@ -27,15 +31,54 @@ class Storage(ABC):
     def set_value(self, key: str, value: Any) -> None:
         """Sets a value in the storage"""
 
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Gets several values in a single round trip, None is returned for missing keys"""
+
+    @abstractmethod
+    def set_many(self, values: Dict[str, Any]) -> None:
+        """Sets several values in a single round trip"""
+
+    @abstractmethod
+    def increment_counters(self, key: str, counters: Dict[str, int]) -> None:
+        """Atomically increments the named counters stored under the key"""
+
+    @abstractmethod
+    def get_counters(self, key: str) -> Dict[str, int]:
+        """Returns all the counters stored under the key, empty if there are none"""
+
+    @abstractmethod
+    def append_values(self, key: str, values: List[str]) -> None:
+        """Appends strings to the end of the list stored under the key"""
+
+    @abstractmethod
+    def get_values_from(self, key: str, start: int) -> List[str]:
+        """Returns the strings in the list stored under the key, starting at the given position"""
+
+    @abstractmethod
+    def expire(self, key: str, expire_after: ExpiryT) -> bool:
+        """Resets the expiration of a key, returns False if the key doesn't exist"""
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Notifies the subscribers of a channel, messages are not stored"""
+
 
 class RedisDB(Storage):
     def __init__(self, redis_url):
-        self.client = redis.from_url(redis_url)
+        # blocks waiting for a free connection once the pool is exhausted, instead of failing
+        connection_pool = redis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=config.get_redis_max_connections(),
+            timeout=config.get_redis_pool_timeout(),
+            health_check_interval=config.get_redis_health_check_interval(),
+        )
+        self.client = redis.Redis(connection_pool=connection_pool)
 
     def get_value(self, key: str) -> Any:
         value = self.client.get(key)
         if value:
-            return pickle.loads(value)
+            return codec.decode(value)
         else:
             return None
 
@@ -45,11 +88,78 @@ class RedisDB(Storage):
     def set_value(self, key: str, value: Any, expire_after: Union[ExpiryT, None] = None) -> None:
         if expire_after is None:
             expire_after = config.get_default_expires_after()
-        self.client.set(key, pickle.dumps(value), ex=expire_after)
+        self.client.set(key, codec.encode(value), ex=expire_after)
 
+    def get_many(self, keys: List[str]) -> List[Any]:
+        values = []
+        # splits huge requests so a single MGET doesn't block redis for too long
+        for start in range(0, len(keys), MAX_KEYS_PER_REQUEST):
+            values.extend(self.client.mget(keys[start : start + MAX_KEYS_PER_REQUEST]))
+        return [codec.decode(value) if value else None for value in values]
 
-def get_db_client():
+    def set_many(self, values: Dict[str, Any], expire_after: Union[ExpiryT, None] = None) -> None:
+        if expire_after is None:
+            expire_after = config.get_default_expires_after()
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(key, codec.encode(value), ex=expire_after)
+        pipeline.execute()
+
+    def increment_counters(self, key: str, counters: Dict[str, int], expire_after: Union[ExpiryT, None] = None) -> None:
+        if expire_after is None:
+            expire_after = config.get_default_expires_after()
+        pipeline = self.client.pipeline(transaction=True)
+        for counter, amount in counters.items():
+            pipeline.hincrby(key, counter, amount)
+        pipeline.expire(key, expire_after)
+        pipeline.execute()
+
+    def get_counters(self, key: str) -> Dict[str, int]:
+        return {counter.decode(): int(value) for counter, value in self.client.hgetall(key).items()}
+
+    def append_values(self, key: str, values: List[str], expire_after: Union[ExpiryT, None] = None) -> None:
+        if expire_after is None:
+            expire_after = config.get_default_expires_after()
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.rpush(key, *values)
+        pipeline.expire(key, expire_after)
+        pipeline.execute()
+
+    def get_values_from(self, key: str, start: int) -> List[str]:
+        return [value.decode() for value in self.client.lrange(key, start, -1)]
+
+    def expire(self, key: str, expire_after: ExpiryT) -> bool:
+        return bool(self.client.expire(key, expire_after))
+
+    def publish(self, channel: str, message: str) -> None:
+        self.client.publish(channel, message)
+
+
+_db_client = None
+_db_client_lock = threading.Lock()
+
+
+def _reset_db_client():
+    # forked processes (e.g. celery prefork children) must not share the parent connections
+    global _db_client
+    _db_client = None
+
+
+os.register_at_fork(after_in_child=_reset_db_client)
+
+
+def _create_db_client():
     db_connection = config.get_redis_url()
     scheme = urlparse(db_connection).scheme
     if scheme == "redis":
         return RedisDB(db_connection)
+
+
+def get_db_client():
+    """Returns the db client shared by the whole process"""
+    global _db_client
+    if _db_client is None:
+        with _db_client_lock:
+            if _db_client is None:
+                _db_client = _create_db_client()
+    return _db_client
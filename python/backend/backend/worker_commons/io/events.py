@@ -0,0 +1,88 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
+
+import anyio
+import redis.asyncio
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from backend.worker_commons import config
+from backend.worker_commons.io.db import get_db_client
+
+# read_state returns the state to push (None when nothing changed) and whether the stream is finished
+ReadState = Callable[[], Tuple[Optional[Any], bool]]
+
+_async_client = None
+
+
+def __get_async_client() -> redis.asyncio.Redis:
+    # streams share one pool configured as the sync db client, each open stream holds one of its connections
+    global _async_client
+    if _async_client is None:
+        connection_pool = redis.asyncio.BlockingConnectionPool.from_url(
+            config.get_redis_url(),
+            max_connections=config.get_redis_max_connections(),
+            timeout=config.get_redis_pool_timeout(),
+            health_check_interval=config.get_redis_health_check_interval(),
+        )
+        _async_client = redis.asyncio.Redis(connection_pool=connection_pool)
+    return _async_client
+
+
+def task_events_channel(task_id: str) -> str:
+    return f"task_events:{task_id}"
+
+
+def group_events_channel(group_id: str) -> str:
+    return f"group_events:{group_id}"
+
+
+def publish_event(channel: str, message: str = "") -> None:
+    """
+    Wakes up the streams subscribed to the channel, they read the new state themselves,
+    so a failed publish only delays updates until the next heartbeat
+    """
+    try:
+        get_db_client().publish(channel, message)
+    except Exception as error:
+        logging.warning(f"Failed to publish event on {channel}: {error}")
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def stream_events(channel: str, read_state: ReadState) -> AsyncIterator[str]:
+    """
+    Yields server sent events with the state returned by read_state,
+    which is called (in the threadpool) on start, on every message published on the channel and every heartbeat
+    """
+    pubsub = __get_async_client().pubsub()
+    await pubsub.subscribe(channel)
+    try:
+        while True:
+            state, finished = await run_in_threadpool(read_state)
+            if state is not None:
+                yield format_event("status", state)
+            else:
+                # keeps proxies from closing idle connections
+                yield ": heartbeat\n\n"
+            if finished:
+                break
+
+            await pubsub.get_message(ignore_subscribe_messages=True, timeout=config.get_events_heartbeat())
+            # bursts of finished tasks are coalesced into a single read
+            while await pubsub.get_message(ignore_subscribe_messages=True, timeout=0) is not None:
+                pass
+    finally:
+        # the stream is cancelled when the client disconnects, cleanup must still reach redis
+        with anyio.CancelScope(shield=True):
+            await pubsub.unsubscribe(channel)
+            # returns the connection to the shared pool
+            await pubsub.close()
@@ -16,3 +16,10 @@ class FileNotFoundError(Exception):
 class DataFrameNotLoadedError(Exception):
     workspace_name: str
     dataframe_name: str
+
+
+@dataclass
+class FileTooLargeError(Exception):
+    workspace_name: str
+    file_path: str
+    max_size: int
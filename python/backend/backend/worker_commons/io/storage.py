@@ -3,17 +3,43 @@
 # Licensed under the MIT license. See LICENSE file in the project.
 #
 
+import hashlib
+import io
 import logging
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from datetime import timedelta
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from uuid import uuid4
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+from pydantic import BaseModel
 
 from backend.worker_commons import config
+from backend.worker_commons.cache import LRUCache
 from backend.worker_commons.io.db import get_db_client
-from backend.worker_commons.io.exceptions import FileNotFoundError
+from backend.worker_commons.io.exceptions import FileNotFoundError, FileTooLargeError
+
+ARROW_SUFFIX = ".arrow"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# column types are inferred from the first block of the csv
+INGEST_BLOCK_SIZE = 16 * 1024 * 1024
+# objects outlive their workspace mappings by this long, and recent files are never swept (e.g. uploads in progress)
+SWEEP_GRACE = timedelta(hours=1)
+
+# per process cache of the parsed dataframes, shared by every storage client instance
+dataframe_cache = LRUCache(config.get_dataframe_cache_max_bytes())
+
+
+class DatasetReference(BaseModel):
+    workspace_name: str
+    name: str
+    dataset_id: str
+    columns: Optional[List[str]] = None
 
 
 class StorageClient(ABC):
@@ -22,49 +48,263 @@ class StorageClient(ABC):
         self,
         workspace_name: str,
         name: str,
-        data: Any,
-    ) -> None:
-        pass
+        data: Union[bytes, BinaryIO],
+    ) -> str:
+        """Saves the bytes or binary stream as a file and returns the sha256 of its content"""
+
+    @abstractmethod
+    def ingest(self, dataset_id: str) -> None:
+        """Converts a saved file into the format reads prefer, reads fall back to the saved file until it's done"""
 
     @abstractmethod
-    def read(self, workspace_name: str, name: str) -> Dict:
-        pass
+    def sweep(self) -> int:
+        """Removes the stored files no workspace refers to anymore, returns how many were removed"""
+
+    @abstractmethod
+    def get_dataset_id(self, workspace_name: str, name: str) -> Optional[str]:
+        """Returns a stable identifier of the file content, or None if it isn't known"""
+
+    @abstractmethod
+    def read(self, workspace_name: str, name: str, columns: Optional[List[str]] = None) -> Dict:
+        """Reads a file, optionally loading only the given columns (columns missing in the file are ignored)"""
+
+    @abstractmethod
+    def get_dataset_reference(
+        self, workspace_name: str, name: str, columns: Optional[List[str]] = None
+    ) -> Optional[DatasetReference]:
+        """Returns a reference that workers can load the file from, or None if the file can't be shared"""
+
+    @abstractmethod
+    def read_reference(self, reference: DatasetReference) -> pd.DataFrame:
+        """Loads the dataframe behind a reference, sharing its memory with other processes where possible"""
 
 
 class LocalStorageClient(StorageClient):
+    """
+    Stores uploaded files by the sha256 of their content under objects/,
+    workspaces only map file names to content hashes, so identical uploads are stored once
+    """
+
     def __init__(self, storage_location) -> None:
         self.storage_location = storage_location
-        os.makedirs(self.storage_location, exist_ok=True)
-
-    def _generate_workspace_id(self, workspace_name: str) -> str:
-        workspace_id = str(uuid4())
-        get_db_client().set_value(f"ws_upload_paths:{workspace_name}", workspace_id)
-        return workspace_id
+        self.objects_location = os.path.join(self.storage_location, "objects")
+        os.makedirs(self.objects_location, exist_ok=True)
 
     def _get_workspace_id(self, workspace_name: str) -> str:
+        # workspaces uploaded before the content addressed layout live under an uuid folder
         return get_db_client().get_value(f"ws_upload_paths:{workspace_name}")
 
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self.objects_location, content_hash[:2], content_hash)
+
+    def _marker_key(self, content_hash: str) -> str:
+        return f"storage_objects:{content_hash}"
+
+    def _mark_used(self, content_hash: str) -> None:
+        # the marker expires with the newest workspace mapping to the object, then the object can be swept
+        get_db_client().set_value(
+            self._marker_key(content_hash),
+            True,
+            expire_after=config.get_default_expires_after() + SWEEP_GRACE,
+        )
+
+    def get_dataset_id(self, workspace_name: str, name: str) -> Optional[str]:
+        return get_db_client().get_value(f"ws_files:{workspace_name}:{name}")
+
+    def _write_stream(self, workspace_name: str, name: str, stream: BinaryIO, file_path: str) -> str:
+        # copies the stream in chunks, so large uploads are never fully loaded in memory
+        max_size = config.get_max_upload_size()
+        content_hash = hashlib.sha256()
+        size = 0
+        with open(file_path, "wb") as binary_file:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(workspace_name, name, max_size)
+                content_hash.update(chunk)
+                binary_file.write(chunk)
+        return content_hash.hexdigest()
+
     def save(
         self,
         workspace_name: str,
         name: str,
-        data: Any,
-    ) -> None:
-        # generate an uuid to represent the workspace name
-        final_path = os.path.join(self.storage_location, self._generate_workspace_id(workspace_name))
-        os.makedirs(final_path, exist_ok=True)
-        with open(os.path.join(final_path, name), "wb") as binary_file:
-            binary_file.write(data)
-
-    def read(self, workspace_name: str, name: str) -> pd.DataFrame:
+        data: Union[bytes, BinaryIO],
+    ) -> str:
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        temp_path = os.path.join(self.objects_location, f"{uuid4()}.upload")
         try:
-            # gets the uuid that represents the workspace name
-            workspace_id = self._get_workspace_id(workspace_name)
-            return pd.read_csv(os.path.join(self.storage_location, workspace_id, name))
+            content_hash = self._write_stream(workspace_name, name, stream, temp_path)
+            object_path = self._object_path(content_hash)
+            self._mark_used(content_hash)
+            if os.path.exists(object_path):
+                logging.info(f"File: {name} for workspace: {workspace_name} already stored as {content_hash}")
+                # keeps a sweep that listed the object before it was marked from removing it
+                os.utime(object_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        get_db_client().set_value(f"ws_files:{workspace_name}:{name}", content_hash)
+        return content_hash
+
+    def sweep(self) -> int:
+        db_client = get_db_client()
+        min_age = SWEEP_GRACE.total_seconds()
+        now = time.time()
+
+        candidates = []
+        for directory, _, names in os.walk(self.objects_location):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    if now - os.path.getmtime(path) >= min_age:
+                        candidates.append(path)
+                except OSError:
+                    continue
+
+        # objects are named by their hash, their arrow copies and leftovers of failed writes start with it
+        content_hashes = sorted({os.path.basename(path).split(".")[0] for path in candidates})
+        markers = db_client.get_many([self._marker_key(content_hash) for content_hash in content_hashes])
+        unused = {content_hash for content_hash, marker in zip(content_hashes, markers) if marker is None}
+
+        removed = 0
+        for path in candidates:
+            if os.path.basename(path).split(".")[0] not in unused:
+                continue
+            try:
+                # the object may have been uploaded again since it was listed
+                if now - os.path.getmtime(path) < min_age:
+                    continue
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        if removed > 0:
+            logging.info(f"Removed {removed} stored files no workspace refers to")
+        return removed
+
+    def _open_csv(self, file_path: str) -> pa_csv.CSVStreamingReader:
+        def open_csv(column_types):
+            return pa_csv.open_csv(
+                file_path,
+                read_options=pa_csv.ReadOptions(block_size=INGEST_BLOCK_SIZE),
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types),
+            )
+
+        reader = open_csv({})
+        # pandas keeps dates as strings, so the columns read from arrow match the ones read from the csv
+        temporal_types = {field.name: pa.string() for field in reader.schema if pa.types.is_temporal(field.type)}
+        if len(temporal_types) == 0:
+            return reader
+        reader.close()
+        return open_csv(temporal_types)
+
+    def ingest(self, dataset_id: str) -> None:
+        # converts the uploaded csv once into an arrow ipc file (schema included), so reads don't need
+        # to parse the csv again. The csv is streamed in blocks, so the conversion never holds the whole dataset
+        file_path = self._object_path(dataset_id)
+        if config.get_dataset_format() != "arrow" or os.path.exists(f"{file_path}{ARROW_SUFFIX}"):
+            return
+
+        temp_path = f"{file_path}.{uuid4()}{ARROW_SUFFIX}"
+        try:
+            reader = self._open_csv(file_path)
+            with pa.ipc.new_file(temp_path, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+            os.replace(temp_path, f"{file_path}{ARROW_SUFFIX}")
+        except Exception as error:
+            logging.warning(f"Failed to convert {file_path} to arrow, reads will fallback to csv: {error}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _read_arrow(self, file_path: str, columns: Optional[List[str]], zero_copy: bool = False) -> pd.DataFrame:
+        if columns is not None:
+            with pa.memory_map(file_path) as source:
+                file_columns = pa.ipc.open_file(source).schema.names
+            columns = [column for column in file_columns if column in columns]
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+        if zero_copy:
+            # numeric columns without nulls become read only views of the memory mapped file
+            return table.to_pandas(split_blocks=True)
+        return table.to_pandas()
+
+    def _read_csv(self, file_path: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        if columns is not None:
+            return pd.read_csv(file_path, usecols=lambda column: column in columns)
+        return pd.read_csv(file_path)
+
+    def _resolve(self, workspace_name: str, name: str) -> Tuple[str, Tuple]:
+        content_hash = self.get_dataset_id(workspace_name, name)
+        if content_hash is not None:
+            # stored objects never change, so the hash alone identifies the content
+            return self._object_path(content_hash), (content_hash,)
+
+        # gets the uuid that represents the workspace name
+        workspace_id = self._get_workspace_id(workspace_name)
+        file_path = os.path.join(self.storage_location, workspace_id, name)
+        arrow_path = f"{file_path}{ARROW_SUFFIX}"
+        stat = os.stat(arrow_path if os.path.exists(arrow_path) else file_path)
+        return file_path, (workspace_id, name, stat.st_mtime_ns, stat.st_size)
+
+    def read(self, workspace_name: str, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        try:
+            file_path, identity = self._resolve(workspace_name, name)
+            columns = sorted(set(columns)) if columns is not None else None
+            cache_key = (*identity, None if columns is None else tuple(columns))
+
+            dataframe = dataframe_cache.get(cache_key)
+            if dataframe is None:
+                arrow_path = f"{file_path}{ARROW_SUFFIX}"
+                if os.path.exists(arrow_path):
+                    dataframe = self._read_arrow(arrow_path, columns)
+                else:
+                    dataframe = self._read_csv(file_path, columns)
+                dataframe_cache.put(cache_key, dataframe)
+                logging.debug(f"Dataframe cache miss for {name}: {dataframe_cache.stats()}")
         except:  # noqa: E722
             logging.error(f"File: {name} not found for workspace: {workspace_name}")
             raise FileNotFoundError(workspace_name, name)
 
+        # callers get a shallow copy, so adding or replacing columns won't change the cached dataframe
+        return dataframe.copy(deep=False)
+
+    def get_dataset_reference(
+        self, workspace_name: str, name: str, columns: Optional[List[str]] = None
+    ) -> Optional[DatasetReference]:
+        dataset_id = self.get_dataset_id(workspace_name, name)
+        if dataset_id is None or not os.path.exists(f"{self._object_path(dataset_id)}{ARROW_SUFFIX}"):
+            return None
+        return DatasetReference(
+            workspace_name=workspace_name,
+            name=name,
+            dataset_id=dataset_id,
+            columns=sorted(set(columns)) if columns is not None else None,
+        )
+
+    def read_reference(self, reference: DatasetReference) -> pd.DataFrame:
+        cache_key = (
+            reference.dataset_id,
+            "memory_map",
+            None if reference.columns is None else tuple(reference.columns),
+        )
+        dataframe = dataframe_cache.get(cache_key)
+        if dataframe is None:
+            try:
+                arrow_path = f"{self._object_path(reference.dataset_id)}{ARROW_SUFFIX}"
+                dataframe = self._read_arrow(arrow_path, reference.columns, zero_copy=True)
+            except:  # noqa: E722
+                logging.error(f"File: {reference.name} not found for workspace: {reference.workspace_name}")
+                raise FileNotFoundError(reference.workspace_name, reference.name)
+            dataframe_cache.put(cache_key, dataframe)
+
+        return dataframe.copy(deep=False)
+
 
 def get_storage_client(preferred_storage=None):
     if preferred_storage is None:
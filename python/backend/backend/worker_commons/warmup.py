@@ -0,0 +1,63 @@
+#
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE file in the project.
+#
+
+import importlib
+import logging
+import time
+from types import ModuleType
+from typing import Dict
+
+from celery import Celery
+from celery.signals import worker_init, worker_process_init
+
+from backend.worker_commons import config
+
+_warmup_modules: Dict[str, ModuleType] = {}
+
+
+def _preload_modules(**kwargs) -> None:
+    # runs once in the main worker process, prefork children inherit the imported modules
+    started_at = time.perf_counter()
+    for name in config.get_worker_warmup_modules():
+        module_started_at = time.perf_counter()
+        try:
+            _warmup_modules[name] = importlib.import_module(name)
+        except Exception as error:
+            logging.warning(f"Warm-up failed to import {name}: {error}")
+            continue
+        logging.info(f"Warm-up imported {name} in {time.perf_counter() - module_started_at:.2f}s")
+    logging.info(f"Warm-up preloaded {len(_warmup_modules)} modules in {time.perf_counter() - started_at:.2f}s")
+
+
+def _run_warmups(**kwargs) -> None:
+    # runs in every child process before it accepts tasks,
+    # thread pools (e.g. openmp) and lazy initializations don't survive a fork
+    started_at = time.perf_counter()
+    for name, module in _warmup_modules.items():
+        warmup = getattr(module, "warmup", None)
+        if not callable(warmup):
+            continue
+        module_started_at = time.perf_counter()
+        try:
+            warmup()
+        except Exception as error:
+            logging.warning(f"Warm-up of {name} failed: {error}")
+            continue
+        logging.info(f"Warm-up of {name} finished in {time.perf_counter() - module_started_at:.2f}s")
+    logging.info(f"Worker process warmed up in {time.perf_counter() - started_at:.2f}s")
+
+
+def register_warmup(app: Celery) -> None:
+    """
+    Preloads the WORKER_WARMUP_MODULES when the worker starts
+    and runs their warmup() in each pool process before it accepts tasks
+    """
+    if not config.get_worker_warmup_enabled():
+        return
+
+    # child processes are killed if they don't finish their initialization within this time
+    app.conf.worker_proc_alive_timeout = config.get_worker_warmup_timeout()
+    worker_init.connect(_preload_modules, weak=False)
+    worker_process_init.connect(_run_warmups, weak=False)
@@ -1,6 +1,10 @@
 from celery import Celery
+from celery.signals import task_postrun
+from kombu import Queue
 
 from backend.worker_commons import config
+from backend.worker_commons.io.events import publish_event, task_events_channel
+from backend.worker_commons.warmup import register_warmup
 
 backend_worker = Celery("app", backend=config.get_redis_url(), broker=config.get_redis_url())
 backend_worker.conf.task_serializer = "pickle"
@@ -9,6 +13,41 @@ backend_worker.conf.accept_content = [
     "application/json",
     "application/x-python-serialize",
 ]
+# results kept by celery (e.g. discover and identify estimand) expire with the values stored in the db,
+# exposure tasks that store their results in the db don't keep a copy in the result backend (ignore_result)
+backend_worker.conf.result_expires = config.get_default_expires_after()
+
+# workers consume every queue unless started with --queues (WORKER_QUEUES),
+# so each workload class can get its own pool and concurrency
+INTERACTIVE_QUEUE = "interactive"
+EXPOSURE_QUEUE = "exposure"
+SIMULATION_QUEUE = "simulation"
+DISCOVER_QUEUE = "discover"
+
+backend_worker.conf.task_queues = [
+    Queue(INTERACTIVE_QUEUE),
+    Queue(EXPOSURE_QUEUE),
+    Queue(SIMULATION_QUEUE),
+    Queue(DISCOVER_QUEUE),
+]
+backend_worker.conf.task_default_queue = EXPOSURE_QUEUE
+backend_worker.conf.task_routes = {
+    # quick tasks the api waits on, or that only schedule/record other tasks
+    "backend.exposure.worker.identify_estimand_task.*": {"queue": INTERACTIVE_QUEUE},
+    "backend.discover.worker.deci_intervention_task.*": {"queue": INTERACTIVE_QUEUE},
+    "backend.exposure.worker.group_progress.*": {"queue": INTERACTIVE_QUEUE},
+    "backend.exposure.worker.significance_test_task.compute_null_effects": {"queue": INTERACTIVE_QUEUE},
+    # significance test fan-out
+    "backend.exposure.worker.significance_test_task.__compute_null_effect": {"queue": SIMULATION_QUEUE},
+    # model training, can take several minutes
+    "backend.discover.worker.causal_discovery_task.*": {"queue": DISCOVER_QUEUE},
+}
+backend_worker.conf.worker_prefetch_multiplier = config.get_worker_prefetch_multiplier()
+# pool processes whose resident memory grew above the limit are replaced once their current task finishes
+if config.get_worker_max_memory_per_child() > 0:
+    backend_worker.conf.worker_max_memory_per_child = config.get_worker_max_memory_per_child()
+register_warmup(backend_worker)
+
 backend_worker.autodiscover_tasks(
     [
         # exposure tasks
@@ -18,8 +57,15 @@ backend_worker.autodiscover_tasks(
         "backend.exposure.worker.confidence_interval_task",
         "backend.exposure.worker.shap_interpreter_task",
         "backend.exposure.worker.significance_test_task",
+        "backend.exposure.worker.group_progress",
         # discover tasks
         "backend.discover.worker.causal_discovery_task",
         "backend.discover.worker.deci_intervention_task",
     ]
 )
+
+
+@task_postrun.connect
+def notify_task_finished(task_id=None, **kwargs):
+    # sent after the result is stored, so streams waiting on the task read its final state
+    publish_event(task_events_channel(task_id))
@@ -6,6 +6,11 @@ else
     extra_params="--concurrency $N_PARALLEL_JOBS"
 fi
 
+if [[ -n "$WORKER_QUEUES" ]]; then
+    # comma separated queues to consume (interactive, exposure, simulation, discover), all of them by default
+    extra_params="$extra_params --queues $WORKER_QUEUES"
+fi
+
 if [[ -z "${DEBUG}" ]]; then
     # worker debug disabled
     echo "Starting backend worker with debug disabled (extra_params=$extra_params)"
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from backend.worker_commons.cache import LRUCache, dataframe_nbytes
+
+
+def test_evicts_least_recently_used_entries():
+    cache = LRUCache(3, sizeof=lambda _: 1)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    cache.put("d", 4)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ["a", "c", "d"]] == [1, 3, 4]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_accounts_for_value_sizes():
+    cache = LRUCache(10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    assert cache.current_bytes == 8
+
+    # replacing a value releases the size of the previous one
+    cache.put("a", "xx")
+    assert cache.current_bytes == 6
+
+    cache.put("c", "xxxxxx")
+    assert cache.get("b") is None
+    assert cache.current_bytes == 8
+    assert cache.stats()["entries"] == 2
+
+
+def test_values_bigger_than_the_budget_are_not_cached():
+    cache = LRUCache(4, sizeof=len)
+    cache.put("a", "xx")
+    cache.put("b", "xxxxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xx"
+    assert cache.current_bytes == 2
+
+
+def test_disabled_cache():
+    cache = LRUCache(0, sizeof=lambda _: 1)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_dataframes_are_sized_by_their_memory_usage():
+    dataframe = pd.DataFrame({"a": range(100), "b": ["value"] * 100})
+    cache = LRUCache(dataframe_nbytes(dataframe))
+    cache.put("a", dataframe)
+
+    assert cache.current_bytes == dataframe_nbytes(dataframe)
+    assert cache.get("a") is dataframe
+
+    cache.clear()
+    assert cache.current_bytes == 0
+    assert cache.get("a") is None
@@ -0,0 +1,59 @@
+import pickle
+
+import pytest
+
+from backend.worker_commons.io import codec
+
+
+def test_decodes_legacy_pickles():
+    value = {"id": "legacy", "values": [1, 2, 3]}
+
+    assert codec.decode(pickle.dumps(value)) == value
+    assert codec.decode(pickle.dumps(value, protocol=2)) == value
+
+
+def test_small_values_are_stored_uncompressed():
+    data = codec.encode("small")
+
+    assert data.startswith(codec.MAGIC)
+    codec_id, size = codec.HEADER.unpack_from(data, len(codec.MAGIC))
+    assert codec_id == 0
+    assert size == len(pickle.dumps("small", protocol=codec.PICKLE_PROTOCOL))
+    assert codec.decode(data) == "small"
+
+
+@pytest.mark.parametrize("name", [name for name in ["zstd", "lz4"] if name in codec._codecs_by_name])
+def test_compressed_round_trip(monkeypatch, name):
+    monkeypatch.setenv("RESULT_COMPRESSION", name)
+    monkeypatch.setenv("RESULT_COMPRESSION_MIN_BYTES", "0")
+    value = ["repeated value"] * 1000
+
+    data = codec.encode(value)
+
+    codec_id, _ = codec.HEADER.unpack_from(data, len(codec.MAGIC))
+    assert codec_id == codec._codecs_by_name[name].codec_id
+    assert len(data) < len(pickle.dumps(value, protocol=codec.PICKLE_PROTOCOL))
+    assert codec.decode(data) == value
+
+
+def test_incompressible_values_keep_the_raw_pickle(monkeypatch):
+    monkeypatch.setenv("RESULT_COMPRESSION_MIN_BYTES", "0")
+    value = bytes(range(256))
+
+    data = codec.encode(value)
+
+    codec_id, _ = codec.HEADER.unpack_from(data, len(codec.MAGIC))
+    assert codec_id == 0
+    assert codec.decode(data) == value
+
+
+def test_unknown_compression_falls_back_to_uncompressed(monkeypatch):
+    monkeypatch.setenv("RESULT_COMPRESSION", "unknown")
+    monkeypatch.setenv("RESULT_COMPRESSION_MIN_BYTES", "0")
+    value = ["repeated value"] * 1000
+
+    data = codec.encode(value)
+
+    codec_id, _ = codec.HEADER.unpack_from(data, len(codec.MAGIC))
+    assert codec_id == 0
+    assert codec.decode(data) == value
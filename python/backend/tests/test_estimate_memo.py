@@ -0,0 +1,101 @@
+import pytest
+
+for library in ["dowhy", "econml", "sklearn", "xgboost"]:
+    pytest.importorskip(library)
+
+from backend.exposure.model.estimate_effect_models import (  # noqa: E402
+    CausalGraphModelSpec,
+    EstimatorSpec,
+    OutcomeSpec,
+    PopulationSpecDataFrame,
+    Specification,
+    TreatmentSpec,
+)
+from backend.exposure.worker import estimate_memo  # noqa: E402
+
+
+def __specification(label="specification", dataset_id="dataset"):
+    return Specification(
+        population=PopulationSpecDataFrame(
+            type="primary", label=label, dataframe=None, variable="population", dataset_id=dataset_id
+        ),
+        treatment=TreatmentSpec(type="primary", label=label, variable="treatment"),
+        outcome=OutcomeSpec(type="primary", label=label, variable="outcome"),
+        model=CausalGraphModelSpec(
+            type="maximum",
+            label=label,
+            treatment="treatment",
+            outcome="outcome",
+            confounders=["confounder"],
+            effect_modifiers=["modifier"],
+            causal_graph="graph",
+        ),
+        estimator=EstimatorSpec(
+            type="primary",
+            label=label,
+            require_propensity_score=False,
+            method_name="backdoor.linear_regression",
+            method_params=None,
+        ),
+    )
+
+
+def __with(specification, part, **changes):
+    return specification.copy(update={part: getattr(specification, part).copy(update=changes)})
+
+
+@pytest.fixture(autouse=True)
+def memoization(monkeypatch):
+    monkeypatch.setattr(estimate_memo.config, "get_estimate_memoization", lambda: True)
+    monkeypatch.setattr(estimate_memo.config, "get_tuning_search_mode", lambda: "grid")
+
+
+def test_labels_dont_change_the_key():
+    assert estimate_memo.get_memo_key(__specification("first")) == estimate_memo.get_memo_key(__specification("second"))
+
+
+@pytest.mark.parametrize(
+    "part,changes",
+    [
+        ("population", {"dataset_id": "other"}),
+        ("population", {"variable": "other"}),
+        ("treatment", {"variable": "other"}),
+        ("outcome", {"variable": "other"}),
+        ("model", {"confounders": ["confounder", "other"]}),
+        ("model", {"effect_modifiers": []}),
+        ("model", {"causal_graph": "other"}),
+        ("estimator", {"method_name": "backdoor.propensity_score_weighting"}),
+        ("estimator", {"method_params": {"init_params": {"alpha": 1}}}),
+        ("estimator", {"require_propensity_score": True}),
+    ],
+)
+def test_estimate_inputs_change_the_key(part, changes):
+    specification = __specification()
+
+    assert estimate_memo.get_memo_key(__with(specification, part, **changes)) != estimate_memo.get_memo_key(
+        specification
+    )
+
+
+def test_tuning_search_mode_changes_the_key(monkeypatch):
+    key = estimate_memo.get_memo_key(__specification())
+    monkeypatch.setattr(estimate_memo.config, "get_tuning_search_mode", lambda: "halving")
+
+    assert estimate_memo.get_memo_key(__specification()) != key
+
+
+def test_library_versions_change_the_key(monkeypatch):
+    key = estimate_memo.get_memo_key(__specification())
+    monkeypatch.setitem(estimate_memo.LIBRARY_VERSIONS, "dowhy", "0.0.0")
+
+    assert estimate_memo.get_memo_key(__specification()) != key
+
+
+def test_unknown_datasets_are_not_memoized():
+    assert estimate_memo.get_memo_key(__specification(dataset_id=None)) is None
+
+
+def test_memoization_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(estimate_memo.config, "get_estimate_memoization", lambda: False)
+
+    assert estimate_memo.get_memo_key(__specification()) is None
@@ -0,0 +1,89 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+# the celery app reads its broker from the environment on import
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+from backend.exposure.worker import group_progress  # noqa: E402
+from backend.worker_commons.io import events  # noqa: E402
+from backend.worker_commons.io.db import RedisDB  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = RedisDB.__new__(RedisDB)
+    db.client = fakeredis.FakeRedis()
+    monkeypatch.setattr(group_progress, "get_db_client", lambda: db)
+    monkeypatch.setattr(events, "get_db_client", lambda: db)
+    return db
+
+
+def __run_in_group(monkeypatch, group_id):
+    request = SimpleNamespace(group=group_id)
+    monkeypatch.setattr(group_progress.celery, "current_task", SimpleNamespace(request=request), raising=False)
+
+
+def test_unknown_groups_have_no_progress(db):
+    assert group_progress.get_group_progress("group") is None
+
+
+def test_counts_finished_tasks(db, monkeypatch):
+    group_progress.init_group_progress("group", 3)
+    __run_in_group(monkeypatch, "group")
+
+    group_progress.record_task_finished("first", failed=False)
+    group_progress.record_task_finished("second", failed=True)
+
+    progress = group_progress.get_group_progress("group")
+    assert (progress.total, progress.completed, progress.failed, progress.revoked) == (3, 1, 1, False)
+    assert progress.finished_ids == ["first", "second"]
+    assert progress.cursor == 2
+
+
+def test_polls_resume_from_the_cursor(db, monkeypatch):
+    group_progress.init_group_progress("group", 3)
+    __run_in_group(monkeypatch, "group")
+    group_progress.record_task_finished("first", failed=False)
+    cursor = group_progress.get_group_progress("group").cursor
+
+    group_progress.record_task_finished("second", failed=False)
+    progress = group_progress.get_group_progress("group", cursor)
+
+    assert progress.finished_ids == ["second"]
+    assert progress.cursor == 2
+    assert group_progress.get_group_progress("group", progress.cursor).finished_ids == []
+
+
+def test_revoked_groups(db):
+    group_progress.init_group_progress("group", 1)
+    group_progress.record_group_revoked("group")
+
+    assert group_progress.get_group_progress("group").revoked
+
+
+def test_failures_only_count_results_not_recorded_before(db, monkeypatch):
+    group_progress.init_group_progress("group", 3)
+    __run_in_group(monkeypatch, "group")
+    group_progress.record_task_finished("first", failed=False)
+
+    request = SimpleNamespace(id="chunk", group="group", kwargs={"result_ids": ["first", "second", "third"]})
+    group_progress.record_task_failure(request, Exception("lost"), None)
+
+    progress = group_progress.get_group_progress("group")
+    assert (progress.completed, progress.failed) == (1, 2)
+
+
+def test_single_tasks_that_stored_their_result_are_not_failed_again(db, monkeypatch):
+    group_progress.init_group_progress("group", 1)
+    __run_in_group(monkeypatch, "group")
+    group_progress.record_task_finished("task", failed=False)
+
+    request = SimpleNamespace(id="task", group="group", kwargs={})
+    group_progress.record_task_failure(request, Exception("failed while publishing"), None)
+
+    progress = group_progress.get_group_progress("group")
+    assert (progress.completed, progress.failed) == (1, 0)
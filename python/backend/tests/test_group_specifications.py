@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("dowhy")
+
+from backend.exposure.inference.estimate_effect import group_specifications  # noqa: E402
+from backend.exposure.model.estimate_effect_models import (  # noqa: E402
+    CausalGraphModelSpec,
+    EstimatorSpec,
+    OutcomeSpec,
+    PopulationSpecDataFrame,
+    Specification,
+    TreatmentSpec,
+)
+
+
+def __specification(population, treatment="treatment", confounders=("confounder",), estimator="linear"):
+    return Specification(
+        population=population,
+        treatment=TreatmentSpec(type="primary", label=treatment, variable=treatment),
+        outcome=OutcomeSpec(type="primary", label="outcome", variable="outcome"),
+        model=CausalGraphModelSpec(
+            type="maximum",
+            label="maximum",
+            treatment=treatment,
+            outcome="outcome",
+            confounders=list(confounders),
+            effect_modifiers=[],
+            causal_graph=f"graph {treatment} {confounders}",
+        ),
+        estimator=EstimatorSpec(
+            type="primary",
+            label=estimator,
+            require_propensity_score=False,
+            method_name=estimator,
+            method_params=None,
+        ),
+    )
+
+
+def __population(label):
+    return PopulationSpecDataFrame(type="primary", label=label, dataframe=None)
+
+
+def test_groups_specifications_sharing_their_causal_model():
+    first, second = __population("first"), __population("second")
+    specifications = [
+        __specification(first, estimator="linear"),
+        __specification(second, estimator="linear"),
+        __specification(first, estimator="forest"),
+        __specification(first, treatment="other", estimator="linear"),
+        __specification(first, confounders=(), estimator="linear"),
+        __specification(first, estimator="matching"),
+    ]
+
+    chunks = group_specifications(specifications, max_chunk_size=20)
+
+    assert [[specifications.index(specification) for specification in chunk] for chunk in chunks] == [
+        [0, 2, 5],
+        [1],
+        [3],
+        [4],
+    ]
+
+
+def test_splits_groups_by_chunk_size():
+    population = __population("population")
+    specifications = [__specification(population, estimator=str(index)) for index in range(5)]
+
+    assert [len(chunk) for chunk in group_specifications(specifications, max_chunk_size=2)] == [2, 2, 1]
+    assert [len(chunk) for chunk in group_specifications(specifications, max_chunk_size=0)] == [1] * 5
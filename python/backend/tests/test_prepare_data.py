@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("dowhy")
+preprocessing = pytest.importorskip("sklearn.preprocessing")
+
+from backend.exposure.inference import estimate_effect  # noqa: E402
+from backend.exposure.model.estimate_effect_models import PopulationSpecDataFrame  # noqa: E402
+
+DATA = pd.DataFrame(
+    {
+        "population": [1, 1, 1, 0, 1, 1, 1],
+        "treatment": [1, 0, 1, 1, 0, 0, 1],
+        "outcome": [0.5, 1.5, 2.5, 3.5, 4.5, np.nan, 6.5],
+        "city": ["b", "a", "C", "z", "b", "a", "é"],
+        "region": pd.Categorical(
+            ["south", "north", "north", "east", "west", "south", "east"],
+            categories=["west", "south", "north", "east", "unused"],
+        ),
+        "age": [30, 40, 50, 60, 70, 80, 90],
+    }
+)
+
+
+def __prepare(variable="population"):
+    population = PopulationSpecDataFrame(type="primary", label="population", dataframe=DATA, variable=variable)
+    return estimate_effect.__prepare_data(population, "treatment", "outcome", ["city", "region"], ["age"])
+
+
+def test_string_codes_match_a_label_encoder():
+    data, encodings = __prepare()
+    expected = DATA[(DATA["population"] == 1) & DATA["outcome"].notna()]
+
+    for var in ["city", "region"]:
+        encoder = preprocessing.LabelEncoder().fit(expected[var].astype(str))
+        assert data[var].tolist() == encoder.transform(expected[var].astype(str)).tolist()
+        assert encodings[var] == encoder.classes_.tolist()
+        assert [encodings[var][code] for code in data[var]] == expected[var].astype(str).tolist()
+
+
+def test_projects_the_population_rows_and_causal_variables():
+    data, _ = __prepare()
+
+    assert list(data.columns) == ["treatment", "outcome", "city", "region", "age"]
+    assert data.index.tolist() == [0, 1, 2, 4, 6]
+    assert len(__prepare(variable=None)[0]) == 6
+
+
+def test_types():
+    data, encodings = __prepare()
+
+    assert data["treatment"].dtype == bool
+    assert data["outcome"].dtype == np.float64
+    assert data["age"].dtype == np.int8
+    assert data["age"].tolist() == [30, 40, 50, 70, 90]
+    assert set(encodings) == {"city", "region"}
+
+
+def test_source_dataframe_is_not_changed():
+    before = DATA.copy()
+    __prepare()
+
+    pd.testing.assert_frame_equal(DATA, before)
@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+from backend.worker_commons.io import storage
+from backend.worker_commons.io.exceptions import FileNotFoundError, FileTooLargeError
+
+CSV = b"a,b,c\n1,x,0.5\n2,y,1.5\n"
+
+
+class InMemoryDB:
+    def __init__(self):
+        self.values = {}
+
+    def get_value(self, key):
+        return self.values.get(key)
+
+    def set_value(self, key, value, expire_after=None):
+        self.values[key] = value
+
+    def get_many(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = InMemoryDB()
+    monkeypatch.setattr(storage, "get_db_client", lambda: db)
+    storage.dataframe_cache.clear()
+    yield db
+    storage.dataframe_cache.clear()
+
+
+@pytest.fixture
+def client(tmp_path, db):
+    return storage.LocalStorageClient(str(tmp_path))
+
+
+def __stored_files(tmp_path):
+    return sorted(name for _, _, names in os.walk(tmp_path / "objects") for name in names)
+
+
+def __make_old(tmp_path):
+    old = time.time() - storage.SWEEP_GRACE.total_seconds() - 60
+    for directory, _, names in os.walk(tmp_path / "objects"):
+        for name in names:
+            os.utime(os.path.join(directory, name), (old, old))
+
+
+def test_identical_uploads_are_stored_once(client, db, tmp_path):
+    first_hash = client.save("workspace", "first.csv", io.BytesIO(CSV))
+    second_hash = client.save("other_workspace", "second.csv", CSV)
+
+    assert first_hash == second_hash == hashlib.sha256(CSV).hexdigest()
+    assert db.get_value("ws_files:workspace:first.csv") == first_hash
+    assert db.get_value("ws_files:other_workspace:second.csv") == first_hash
+    assert __stored_files(tmp_path) == [first_hash]
+    assert client.read("workspace", "first.csv").equals(client.read("other_workspace", "second.csv"))
+
+
+def test_reads_legacy_workspace_uploads(client, db, tmp_path):
+    db.set_value("ws_upload_paths:workspace", "legacy-id")
+    os.makedirs(tmp_path / "legacy-id")
+    (tmp_path / "legacy-id" / "data.csv").write_bytes(CSV)
+
+    dataframe = client.read("workspace", "data.csv")
+
+    assert dataframe["a"].tolist() == [1, 2]
+    assert client.get_dataset_id("workspace", "data.csv") is None
+    assert client.get_dataset_reference("workspace", "data.csv") is None
+
+
+def test_missing_files(client):
+    with pytest.raises(FileNotFoundError):
+        client.read("workspace", "missing.csv")
+
+
+def test_sweep_removes_objects_no_workspace_refers_to(client, db, tmp_path):
+    used_hash = client.save("workspace", "used.csv", CSV)
+    unused_hash = client.save("workspace", "unused.csv", b"a\n1\n")
+    client.ingest(unused_hash)
+    (tmp_path / "objects" / "leftover.upload").write_bytes(b"a\n")
+    del db.values[client._marker_key(unused_hash)]
+    __make_old(tmp_path)
+
+    assert client.sweep() == 3
+    assert __stored_files(tmp_path) == [used_hash]
+
+
+def test_sweep_keeps_recent_files(client, db, tmp_path):
+    content_hash = client.save("workspace", "data.csv", CSV)
+    del db.values[client._marker_key(content_hash)]
+
+    assert client.sweep() == 0
+    assert __stored_files(tmp_path) == [content_hash]
+
+
+def test_uploading_again_keeps_an_object_from_being_swept(client, db, tmp_path):
+    content_hash = client.save("workspace", "data.csv", CSV)
+    del db.values[client._marker_key(content_hash)]
+    __make_old(tmp_path)
+
+    client.save("other_workspace", "data.csv", CSV)
+
+    assert client.sweep() == 0
+    assert __stored_files(tmp_path) == [content_hash]
+
+
+def test_cached_reads_return_independent_frames(client):
+    client.save("workspace", "data.csv", CSV)
+
+    dataframe = client.read("workspace", "data.csv")
+    dataframe["d"] = 1
+
+    assert "d" not in client.read("workspace", "data.csv").columns
+
+
+def test_reads_csv_until_ingested_then_arrow(client):
+    dataset_id = client.save("workspace", "data.csv", CSV)
+    from_csv = client.read("workspace", "data.csv", columns=["a", "c"])
+
+    client.ingest(dataset_id)
+    storage.dataframe_cache.clear()
+    from_arrow = client.read("workspace", "data.csv", columns=["a", "c"])
+
+    assert os.path.exists(f"{client._object_path(dataset_id)}{storage.ARROW_SUFFIX}")
+    assert list(from_arrow.columns) == ["a", "c"]
+    assert from_arrow.equals(from_csv)
+
+
+def test_references_are_shared_once_ingested(client):
+    dataset_id = client.save("workspace", "data.csv", CSV)
+    assert client.get_dataset_reference("workspace", "data.csv") is None
+
+    client.ingest(dataset_id)
+    reference = client.get_dataset_reference("workspace", "data.csv", columns=["b"])
+
+    assert reference.dataset_id == dataset_id
+    assert client.read_reference(reference)["b"].tolist() == ["x", "y"]
+
+
+def test_uploads_over_the_size_limit_are_rejected(client, db, monkeypatch, tmp_path):
+    monkeypatch.setattr(storage.config, "get_max_upload_size", lambda: len(CSV) - 1)
+
+    with pytest.raises(FileTooLargeError):
+        client.save("workspace", "data.csv", CSV)
+
+    assert db.get_value("ws_files:workspace:data.csv") is None
+    assert __stored_files(tmp_path) == []
@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from backend.exposure.inference import tuning_cache
+
+
+class InMemoryDB:
+    def __init__(self):
+        self.values = {}
+
+    def get_value(self, key):
+        return self.values.get(key)
+
+    def set_value(self, key, value, expire_after=None):
+        self.values[key] = value
+
+
+class Model:
+    def __init__(self, max_depth=3, nthread=1):
+        self.max_depth = max_depth
+        self.nthread = nthread
+
+    def get_params(self, deep=True):
+        return {"max_depth": self.max_depth, "nthread": self.nthread}
+
+
+class Search:
+    fits = 0
+
+    def __init__(self, estimator, n_jobs=1, cv=3):
+        self.estimator = estimator
+        self.n_jobs = n_jobs
+        self.cv = cv
+
+    def get_params(self, deep=True):
+        params = {"estimator": self.estimator, "n_jobs": self.n_jobs, "cv": self.cv}
+        if deep:
+            params.update({f"estimator__{name}": value for name, value in self.estimator.get_params().items()})
+        return params
+
+    def fit(self, X, y):
+        Search.fits += 1
+        self.best_params_ = {"max_depth": 5}
+        return self
+
+
+DATA = pd.DataFrame({"confounder": [1, 2, 3, 4], "treatment": [0, 1, 0, 1]})
+
+
+@pytest.fixture(autouse=True)
+def db(monkeypatch):
+    db = InMemoryDB()
+    monkeypatch.setattr(tuning_cache, "get_db_client", lambda: db)
+    monkeypatch.setattr(tuning_cache.config, "get_tuning_cache_enabled", lambda: True)
+    tuning_cache._best_params_cache.clear()
+    Search.fits = 0
+    yield db
+    tuning_cache._best_params_cache.clear()
+
+
+def __best_params(search, data=DATA):
+    return tuning_cache.get_best_params(search, data, ["confounder"], ["treatment"])
+
+
+def test_searches_are_run_once_whatever_their_parallelism():
+    first = __best_params(Search(Model(nthread=1), n_jobs=1))
+    second = __best_params(Search(Model(nthread=8), n_jobs=4))
+
+    assert first == second == {"max_depth": 5}
+    assert Search.fits == 1
+
+
+def test_cached_params_are_shared_across_processes(db):
+    __best_params(Search(Model(), n_jobs=1))
+    tuning_cache._best_params_cache.clear()
+
+    __best_params(Search(Model(nthread=4), n_jobs=2))
+
+    assert Search.fits == 1
+    assert len(db.values) == 1
+
+
+@pytest.mark.parametrize(
+    "search",
+    [
+        Search(Model(max_depth=5)),
+        Search(Model(), cv=5),
+    ],
+)
+def test_search_space_changes_the_key(search):
+    __best_params(Search(Model()))
+    __best_params(search)
+
+    assert Search.fits == 2
+
+
+def test_data_changes_the_key():
+    __best_params(Search(Model()))
+    __best_params(Search(Model()), DATA.assign(confounder=[4, 3, 2, 1]))
+
+    assert Search.fits == 2
+
+
+def test_disabled_cache(monkeypatch, db):
+    monkeypatch.setattr(tuning_cache.config, "get_tuning_cache_enabled", lambda: False)
+    __best_params(Search(Model()))
+    __best_params(Search(Model()))
+
+    assert Search.fits == 2
+    assert db.values == {}